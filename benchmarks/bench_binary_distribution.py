@@ -0,0 +1,72 @@
+"""
+Micro-benchmark of the counting step of get_binary_distribution.
+
+Compares the matrix-based counting in src/server/distributions.py against the
+previous implementation (a per-row apply with pd.to_numeric for the unique
+mode, then one pd.to_numeric per column) on a synthetic multi-select question.
+
+Usage:
+    python benchmarks/bench_binary_distribution.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "server"))
+from distributions import binary_counts  # noqa: E402
+
+
+def legacy_binary(data: pd.DataFrame, columns: list, value: int, unique: bool) -> dict:
+    result = {}
+    if unique:
+        target_mask = data[columns].apply(
+            lambda row: (pd.to_numeric(row, errors='coerce') == value).sum(), axis=1
+        )
+        data = data[target_mask <= 1]
+    for col in columns:
+        numeric_col = pd.to_numeric(data[col], errors='coerce').fillna(0)
+        count = int((numeric_col == value).sum())
+        result[col] = count / len(data) if len(data) > 0 else 0.0
+    return result
+
+
+def vectorized_binary(data: pd.DataFrame, columns: list, value: int, unique: bool) -> dict:
+    counts, rows = binary_counts(data, columns, value, unique)
+    return {col: count / rows if rows > 0 else 0.0 for col, count in zip(columns, counts.tolist())}
+
+
+def make_question(rows: int, cols: int, seed: int = 0) -> pd.DataFrame:
+    """Build 0/1 answer columns, sparse enough that many rows pick a single option."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({f"opt{i}": (rng.random(rows) < 0.06).astype(np.int8) for i in range(cols)})
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    rows, cols = 100_000, 24
+    data = make_question(rows, cols)
+    columns = list(data.columns)
+    print(f"{rows:,} rows x {cols} binary columns")
+    print(f"{'mode':<10}{'legacy (s)':>12}{'vectorized (s)':>16}{'speedup':>10}")
+    for unique in (False, True):
+        expected = legacy_binary(data, columns, 1, unique)
+        assert np.allclose(list(expected.values()), list(vectorized_binary(data, columns, 1, unique).values()))
+        legacy = best_of(lambda: legacy_binary(data, columns, 1, unique), repeat=1 if unique else 3)
+        vectorized = best_of(lambda: vectorized_binary(data, columns, 1, unique), repeat=3)
+        mode = "unique" if unique else "all"
+        print(f"{mode:<10}{legacy:>12.3f}{vectorized:>16.3f}{legacy / vectorized:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Micro-benchmark of the sheet cleaning step in read_excel.
+
+Compares the vectorized per-column engine in src/server/cleaning.py against the
+previous implementation (two DataFrame.map passes plus replace) on synthetic
+wide and tall survey sheets.
+
+Usage:
+    python benchmarks/bench_cleaning.py
+"""
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "server"))
+from cleaning import clean_frame  # noqa: E402
+
+
+def legacy_clean(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.map(lambda x: x.strip() if isinstance(x, str) else x)
+    df = df.map(lambda x: np.nan if isinstance(x, str) and x.strip() == "" else x)
+    df = df.replace([999, "999"], np.nan)
+    return df
+
+
+def make_sheet(rows: int, cols: int, seed: int = 0) -> pd.DataFrame:
+    """Build a sheet mixing coded answers, padded text and blank cells."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(cols):
+        kind = i % 4
+        if kind == 0:
+            data[f"q{i}"] = rng.choice([1, 2, 3, 4, 5, 999], rows)
+        elif kind == 1:
+            data[f"q{i}"] = rng.choice([1.0, 2.0, np.nan, 999.0], rows)
+        elif kind == 2:
+            data[f"q{i}"] = rng.choice(np.array(["Yes", " No ", "", "999", "Maybe"], dtype=object), rows)
+        else:
+            data[f"q{i}"] = rng.choice(np.array(["數學", "物理 ", " ", 3, np.nan], dtype=object), rows)
+    return pd.DataFrame(data)
+
+
+def best_of(func, df: pd.DataFrame, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    warnings.simplefilter("ignore", FutureWarning)
+    shapes = {
+        "wide (2,000 x 300)": (2_000, 300),
+        "tall (200,000 x 12)": (200_000, 12),
+    }
+    print(f"{'sheet':<22}{'legacy (s)':>12}{'vectorized (s)':>16}{'speedup':>10}")
+    for name, (rows, cols) in shapes.items():
+        df = make_sheet(rows, cols)
+        pd.testing.assert_frame_equal(legacy_clean(df), clean_frame(df))
+        legacy = best_of(legacy_clean, df, repeat=3)
+        vectorized = best_of(clean_frame, df, repeat=3)
+        print(f"{name:<22}{legacy:>12.3f}{vectorized:>16.3f}{legacy / vectorized:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark of chart rendering with the persistent render pool.
+
+Renders the same set of distribution charts with fig.to_image, which starts a
+browser for every chart, and with the RenderPool in src/server/render_pool.py,
+one chart at a time and as one batch, and reports charts per second. Needs
+Chrome for Kaleido (install it with `plotly_get_chrome`).
+
+Usage:
+    python benchmarks/bench_render_pool.py [charts] [workers]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "server"))
+from render_pool import IMAGE_HEIGHT, IMAGE_SCALE, IMAGE_WIDTH, RenderPool  # noqa: E402
+
+
+def make_charts(count: int, seed: int = 0) -> list:
+    """Build bar charts of random 5-point distributions, like visualize_column_distribution."""
+    rng = np.random.default_rng(seed)
+    charts = []
+    for i in range(count):
+        shares = rng.dirichlet(np.ones(5))
+        fig = go.Figure(data=[go.Bar(x=[f"option {j}" for j in range(5)], y=shares, marker_color="#1f77b4")])
+        fig.update_layout(title=f"Question {i}", xaxis_title="Categories", yaxis_title="Values")
+        charts.append(fig)
+    return charts
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    charts = make_charts(count)
+
+    def cold():
+        for fig in charts:
+            fig.to_image(format="png", width=IMAGE_WIDTH, height=IMAGE_HEIGHT, scale=IMAGE_SCALE)
+
+    pool = RenderPool(workers=workers)
+    try:
+        startup = timed(pool.start)
+    except Exception as e:
+        print(f"Cannot start the render pool: {e}")
+        return
+    try:
+        results = [
+            ("fig.to_image", timed(cold)),
+            ("pool, one by one", timed(lambda: [pool.render(fig) for fig in charts])),
+            (f"pool, batch of {count}", timed(lambda: pool.render_many(charts))),
+        ]
+    finally:
+        pool.stop()
+
+    print(f"{count} charts, {workers} workers, pool startup and warmup {startup:.2f}s")
+    print(f"{'mode':<22}{'time (s)':>10}{'charts/s':>10}")
+    for mode, seconds in results:
+        print(f"{mode:<22}{seconds:>10.2f}{count / seconds:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
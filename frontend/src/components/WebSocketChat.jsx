@@ -3,6 +3,43 @@ import ReactMarkdown from 'react-markdown';
 import remarkGfm from 'remark-gfm';
 import './WebSocketChat.css';
 
+// Chart returned as a Plotly figure in JSON, drawn in the browser instead of as an image.
+// plotly.js matches the major version of the server's plotly and is loaded with the first chart.
+const PlotlyChart = ({ url }) => {
+  const containerRef = useRef(null);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    const container = containerRef.current;
+    let cancelled = false;
+    let plotly = null;
+    Promise.all([
+      import('plotly.js-dist-min'),
+      fetch(url).then(response => {
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        return response.json();
+      })
+    ])
+      .then(([module, figure]) => {
+        if (cancelled) return;
+        plotly = module.default;
+        return plotly.newPlot(container, figure.data, figure.layout, { responsive: true, displaylogo: false });
+      })
+      .catch(e => {
+        if (!cancelled) setError(e.message);
+      });
+    return () => {
+      cancelled = true;
+      if (plotly) plotly.purge(container);
+    };
+  }, [url]);
+
+  if (error) {
+    return <div className="image-error">Failed to load chart</div>;
+  }
+  return <div ref={containerRef} className="plotly-chart" />;
+};
+
 const WebSocketChat = forwardRef(({ model, onConnectionChange }, ref) => {
   const [messages, setMessages] = useState([]);
   const [inputMessage, setInputMessage] = useState('');
@@ -77,22 +114,34 @@ const WebSocketChat = forwardRef(({ model, onConnectionChange }, ref) => {
     isConnecting
   }));
 
+  // Image data of a response with one "image_path" or several "image_paths"
+  const imagesOf = (parsed) => {
+    if (!parsed.text) return [];
+    const paths = Array.isArray(parsed.image_paths) ? parsed.image_paths : [];
+    return (parsed.image_path ? [parsed.image_path, ...paths] : paths)
+      .filter(imagePath => typeof imagePath === 'string')
+      .map(imagePath => {
+        // Extract filename from the absolute path and construct the correct URL
+        const pathSeparator = imagePath.includes('\\') ? '\\' : '/';
+        const filename = imagePath.split(pathSeparator).pop();
+        return {
+          path: imagePath,
+          url: `http://localhost:8000/image/${filename}`
+        };
+      });
+  };
+
   const processResponseContent = (content) => {
     let text = content;
     let imageDatas = [];
     
-    // Try to parse as raw JSON first (single image format)
+    // Try to parse as raw JSON first (image format)
     try {
       const parsed = JSON.parse(content);
-      if (parsed.text && parsed.image_path) {
+      const images = imagesOf(parsed);
+      if (images.length > 0) {
         text = parsed.text;
-        // Extract filename from the absolute path and construct the correct URL
-        const pathSeparator = parsed.image_path.includes('\\') ? '\\' : '/';
-        const filename = parsed.image_path.split(pathSeparator).pop();
-        imageDatas = [{
-          path: parsed.image_path,
-          url: `http://localhost:8000/image/${filename}`
-        }];
+        imageDatas = images;
         return { text, imageDatas };
       }
     } catch (e) {
@@ -100,7 +149,7 @@ const WebSocketChat = forwardRef(({ model, onConnectionChange }, ref) => {
     }
     
     // Look for JSON objects in markdown code blocks
-    const jsonCodeBlockRegex = /```json\s*(\{[^{]*"text"[^}]*"image_path"[^}]*\})\s*```/g;
+    const jsonCodeBlockRegex = /```json\s*(\{[^{]*"text"[^}]*"image_paths?"[^}]*\})\s*```/g;
     let codeBlockMatch;
     const codeBlocks = [];
     
@@ -110,14 +159,9 @@ const WebSocketChat = forwardRef(({ model, onConnectionChange }, ref) => {
         const fullMatch = codeBlockMatch[0];
         const jsonString = codeBlockMatch[1];
         const parsed = JSON.parse(jsonString);
-        if (parsed.text && parsed.image_path) {
-          // Extract filename and create image data
-          const pathSeparator = parsed.image_path.includes('\\') ? '\\' : '/';
-          const filename = parsed.image_path.split(pathSeparator).pop();
-          imageDatas.push({
-            path: parsed.image_path,
-            url: `http://localhost:8000/image/${filename}`
-          });
+        const images = imagesOf(parsed);
+        if (images.length > 0) {
+          imageDatas.push(...images);
           
           // Store the full match to remove later
           codeBlocks.push(fullMatch);
@@ -134,7 +178,7 @@ const WebSocketChat = forwardRef(({ model, onConnectionChange }, ref) => {
     });
     
     // Also look for raw JSON objects in the content
-    const jsonObjectRegex = /\{[^{]*"text"[^}]*"image_path"[^}]*\}/g;
+    const jsonObjectRegex = /\{[^{]*"text"[^}]*"image_paths?"[^}]*\}/g;
     let jsonMatch;
     const jsonObjects = [];
     
@@ -143,14 +187,9 @@ const WebSocketChat = forwardRef(({ model, onConnectionChange }, ref) => {
       try {
         const fullMatch = jsonMatch[0];
         const parsed = JSON.parse(fullMatch);
-        if (parsed.text && parsed.image_path) {
-          // Extract filename and create image data
-          const pathSeparator = parsed.image_path.includes('\\') ? '\\' : '/';
-          const filename = parsed.image_path.split(pathSeparator).pop();
-          imageDatas.push({
-            path: parsed.image_path,
-            url: `http://localhost:8000/image/${filename}`
-          });
+        const images = imagesOf(parsed);
+        if (images.length > 0) {
+          imageDatas.push(...images);
           
           // Store the full match to remove later
           jsonObjects.push(fullMatch);
@@ -378,24 +417,28 @@ const WebSocketChat = forwardRef(({ model, onConnectionChange }, ref) => {
                       <div className="images-container">
                         {msg.imageDatas.map((imageData, index) => (
                           <div key={index} className="image-container">
-                            <img 
-                              src={imageData.url} 
-                              alt={`Analysis visualization ${index + 1}`} 
-                              onError={(e) => {
-                                e.target.style.display = 'none';
-                                // Show error message
-                                const errorDiv = document.createElement('div');
-                                errorDiv.className = 'image-error';
-                                errorDiv.textContent = 'Failed to load image';
-                                errorDiv.style.color = 'red';
-                                errorDiv.style.fontStyle = 'italic';
-                                e.target.parentNode.appendChild(errorDiv);
-                              }}
-                              onLoad={(e) => {
-                                // Image loaded successfully
-                                console.log('Image loaded successfully');
-                              }}
-                            />
+                            {imageData.url.endsWith('.json') ? (
+                              <PlotlyChart url={imageData.url} />
+                            ) : (
+                              <img 
+                                src={imageData.url} 
+                                alt={`Analysis visualization ${index + 1}`} 
+                                onError={(e) => {
+                                  e.target.style.display = 'none';
+                                  // Show error message
+                                  const errorDiv = document.createElement('div');
+                                  errorDiv.className = 'image-error';
+                                  errorDiv.textContent = 'Failed to load image';
+                                  errorDiv.style.color = 'red';
+                                  errorDiv.style.fontStyle = 'italic';
+                                  e.target.parentNode.appendChild(errorDiv);
+                                }}
+                                onLoad={(e) => {
+                                  // Image loaded successfully
+                                  console.log('Image loaded successfully');
+                                }}
+                              />
+                            )}
                           </div>
                         ))}
                       </div>
@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+import pandas as pd
+
+# Memory budget for cached DataFrames, configurable through the environment.
+CACHE_MAX_BYTES = int(float(os.environ.get("EXCEL_CACHE_MAX_MB", "512")) * 1024 * 1024)
+
+Fingerprint = Tuple[str, int, int]
+
+
+def file_fingerprint(path: str) -> Fingerprint:
+    """
+    Identify the current version of a file on disk.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        Tuple of (resolved path, modification time in ns, size in bytes)
+    """
+    resolved = os.path.realpath(path)
+    stat = os.stat(resolved)
+    return (resolved, stat.st_mtime_ns, stat.st_size)
+
+
+class DataFrameCache:
+    """
+    LRU cache of cleaned DataFrames bounded by their in-memory size.
+
+    Entries are keyed by the file fingerprint plus an optional variant, so a
+    modified workbook never serves stale data. Besides frames, the cache holds
+    per-file artifacts derived from them (indexes, profiles), which share the
+    memory budget. Cached objects are shared between callers and must not be
+    modified in place.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[Fingerprint, Hashable], Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._current_bytes = 0
+        self._loaded_at: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, fingerprint: Fingerprint, variant: Hashable = None) -> Optional[pd.DataFrame]:
+        found = self.lookup(fingerprint, [variant])
+        return None if found is None else found[1]
+
+    def lookup(
+        self, fingerprint: Fingerprint, variants: Iterable[Hashable], record: bool = True
+    ) -> Optional[Tuple[Hashable, pd.DataFrame]]:
+        """
+        Return the first cached variant of a file, counted as a single lookup.
+
+        Args:
+            fingerprint: Fingerprint of the file
+            variants: Acceptable variants in order of preference
+            record: Whether the lookup counts towards the hit/miss statistics
+
+        Returns:
+            Tuple of (variant, DataFrame), or None if no variant is cached
+        """
+        with self._lock:
+            for variant in variants:
+                key = (fingerprint, variant)
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += record
+                    return variant, entry[0]
+            self.misses += record
+            return None
+
+    def put(
+        self, fingerprint: Fingerprint, df: Any, variant: Hashable = None, nbytes: Optional[int] = None
+    ) -> None:
+        """
+        Store a frame, or any other object derived from the file.
+
+        Args:
+            fingerprint: Fingerprint of the file
+            df: DataFrame or artifact to cache
+            variant: Variant of the file the object belongs to
+            nbytes: Size of the object, required for objects other than DataFrames
+        """
+        if nbytes is None:
+            nbytes = int(df.memory_usage(deep=True).sum())
+        key = (fingerprint, variant)
+        with self._lock:
+            # Older versions of the same file can never be hit again
+            self._discard(lambda k: k[0][0] == fingerprint[0] and k[0] != fingerprint)
+            self._discard(lambda k: k == key)
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (df, nbytes)
+            self._current_bytes += nbytes
+            self._loaded_at[fingerprint[0]] = time.time()
+            while self._current_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._current_bytes -= evicted_bytes
+                self.evictions += 1
+
+    def loaded_at(self, path: str) -> Optional[float]:
+        """Return when data of the given file was last stored, as a Unix timestamp."""
+        return self._loaded_at.get(os.path.realpath(path))
+
+    def invalidate(self, path: str) -> None:
+        """Drop every cached entry that belongs to the given file."""
+        resolved = os.path.realpath(path)
+        with self._lock:
+            self._discard(lambda k: k[0][0] == resolved)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _discard(self, predicate) -> None:
+        for key in [k for k in self._entries if predicate(k)]:
+            _, nbytes = self._entries.pop(key)
+            self._current_bytes -= nbytes
+
+
+dataframe_cache = DataFrameCache()
@@ -0,0 +1,147 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+# Rendered charts are written to the temp directory, which the API server serves images from
+CHART_DIR = tempfile.gettempdir()
+CHART_CACHE_MAX_BYTES = int(float(os.environ.get("EXCEL_CHART_CACHE_MB", "256")) * 1024 * 1024)
+
+CHART_PREFIX = "chart_"
+
+
+def chart_key(tool: str, data: Any, **params: Any) -> str:
+    """
+    Hash the input data and styling parameters of a chart.
+
+    The data keeps its order, which is the order of the bars, parameters are
+    sorted by name. Data passed as a JSON string or as the parsed object gives
+    the same key.
+
+    Args:
+        tool: Name of the tool drawing the chart
+        data: Parsed chart data
+        params: Every other argument that changes the image
+
+    Returns:
+        Hex digest naming the chart
+    """
+    encoded = json.dumps([tool, data, sorted(params.items())], ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:32]
+
+
+class ChartCache:
+    """
+    Rendered charts stored under a file name derived from their content.
+
+    A chart drawn again from the same data and parameters is served from the
+    stored file, under the same name. Least recently used charts are deleted
+    once the stored charts exceed max_bytes.
+    """
+
+    def __init__(self, directory: str = CHART_DIR, max_bytes: int = CHART_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def file_name(self, key: str, extension: str) -> str:
+        return f"{CHART_PREFIX}{key}.{extension}"
+
+    def get(self, key: str, extension: str) -> Optional[str]:
+        """
+        Look up a stored chart.
+
+        Returns:
+            The file name of the chart, relative to the chart directory, or None
+        """
+        name = self.file_name(key, extension)
+        try:
+            # The modification time orders the charts for eviction
+            os.utime(os.path.join(self.directory, name))
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return name
+
+    def put(self, key: str, extension: str, image: bytes) -> str:
+        """
+        Store a rendered chart and evict the least recently used ones over the budget.
+
+        Returns:
+            The file name of the chart, relative to the chart directory
+        """
+        name = self.file_name(key, extension)
+        path = os.path.join(self.directory, name)
+        os.makedirs(self.directory, exist_ok=True)
+        # Written under a temporary name, so a chart is never served half written
+        fd, tmp_path = tempfile.mkstemp(prefix=".chart-", dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(image)
+        os.replace(tmp_path, path)
+        self._evict(keep=path)
+        return name
+
+    def clear(self) -> None:
+        for path in self._files():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        files = self._files()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "charts": len(files),
+                "bytes": sum(self._size(path) for path in files),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _files(self):
+        return glob.glob(os.path.join(glob.escape(self.directory), CHART_PREFIX + "*"))
+
+    @staticmethod
+    def _size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _evict(self, keep: str) -> None:
+        with self._lock:
+            entries = []
+            for path in self._files():
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                self.evictions += 1
+
+
+chart_cache = ChartCache()
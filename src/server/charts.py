@@ -0,0 +1,302 @@
+import io
+import json
+import math
+import numbers
+import os
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from chart_cache import chart_cache, chart_key
+from render_pool import IMAGE_HEIGHT, IMAGE_SCALE, IMAGE_WIDTH, render_pool
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - pillow is optional, WebP is then encoded by the browser
+    Image = None
+
+# One series of values per chart, or several series drawn side by side or on top of each other
+SINGLE_SERIES_TYPES = ("bar", "pie", "line")
+MULTI_SERIES_TYPES = ("grouped", "stacked")
+CHART_TYPES = SINGLE_SERIES_TYPES + MULTI_SERIES_TYPES
+
+CHART_LAYOUTS = ("separate", "grid")
+
+# Images rendered by the server, or the figure as JSON for the frontend to draw with plotly.js
+OUTPUT_FORMATS = ("png", "svg", "webp", "json")
+DEFAULT_OUTPUT_FORMAT = os.environ.get("EXCEL_CHART_FORMAT", "png")
+
+# Quality of the WebP encoding (0-100)
+WEBP_QUALITY = int(os.environ.get("EXCEL_WEBP_QUALITY", "80"))
+
+# Largest scale a tool call may ask for, the pixels grow with its square
+MAX_IMAGE_SCALE = float(os.environ.get("EXCEL_MAX_IMAGE_SCALE", "4"))
+
+# Y-axis titles replaced by "Percentage" when the axis shows percentages
+DEFAULT_Y_LABELS = ("Values", "Proportion")
+
+# Height of each row of a grid of charts, in pixels before scaling
+GRID_ROW_HEIGHT = 400
+
+
+def _is_value(value: Any) -> bool:
+    # Numbers, or None for a missing value
+    return value is None or (isinstance(value, numbers.Real) and not isinstance(value, bool))
+
+
+def load_chart_data(data: Any) -> Any:
+    """Parse chart data passed as a JSON string, tool results are passed as they are."""
+    return json.loads(data) if isinstance(data, str) else data
+
+
+@dataclass
+class ChartSpec:
+    """
+    Description of one chart.
+
+    data maps categories to values for bar, pie and line charts, and series
+    names to such mappings for grouped and stacked bar charts. Categories are
+    drawn in the order of the data.
+    """
+
+    data: Dict[str, Any]
+    type: str = "bar"
+    title: str = ""
+    x_label: str = "Categories"
+    y_label: str = "Values"
+    color: Optional[str] = "#1f77b4"
+    show_percentage: bool = False
+
+    @classmethod
+    def from_dict(cls, spec: Dict[str, Any]) -> "ChartSpec":
+        """
+        Read and check a chart spec, such as {"type": "pie", "data": {...}, "title": "..."}.
+
+        Raises:
+            ValueError: If the spec has no data, unknown fields, an unsupported type or values that are not numbers
+        """
+        if not isinstance(spec, dict) or "data" not in spec:
+            raise ValueError(f"Chart spec {spec} has no \"data\"")
+        unknown = set(spec) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"Unknown chart spec fields: {', '.join(sorted(unknown))}")
+        chart = cls(**{**spec, "data": load_chart_data(spec["data"])})
+        chart.validate()
+        return chart
+
+    def validate(self) -> None:
+        if self.type not in CHART_TYPES:
+            raise ValueError(f"Unsupported chart type: {self.type}")
+        if not isinstance(self.data, dict):
+            raise ValueError("Chart data must map categories to values")
+        if self.type in MULTI_SERIES_TYPES and not all(isinstance(series, dict) for series in self.data.values()):
+            raise ValueError(f"Data of a {self.type} chart must map series names to categories and values")
+        if self.type in MULTI_SERIES_TYPES:
+            values = [(f"{name}/{key}", value) for name, series in self.data.items() for key, value in series.items()]
+        else:
+            values = list(self.data.items())
+        for key, value in values:
+            if not _is_value(value):
+                raise ValueError(f"Value of {key} in the chart data is not a number: {value!r}")
+
+    @property
+    def axis_title(self) -> str:
+        if self.show_percentage and self.y_label in DEFAULT_Y_LABELS:
+            return "Percentage"
+        return self.y_label
+
+
+def _categories(series: Dict[str, Dict[str, Any]]) -> List[str]:
+    # Categories in order of first appearance across the series
+    return list(dict.fromkeys(k for values in series.values() for k in values))
+
+
+def add_chart(fig: go.Figure, chart: ChartSpec, index: int = 0, row: Optional[int] = None, col: Optional[int] = None) -> None:
+    """
+    Add the traces of a chart to a figure, or to one cell of a grid figure.
+
+    Stacked bars are drawn as bars sharing an offset group, each starting where
+    the previous series ends, so stacked and grouped charts can share a grid.
+    """
+    cell = {"row": row, "col": col} if row is not None else {}
+    labels = list(chart.data.keys())
+    values = list(chart.data.values())
+    if chart.type == "bar":
+        fig.add_trace(go.Bar(x=labels, y=values, marker_color=chart.color, showlegend=False), **cell)
+    elif chart.type == "pie":
+        fig.add_trace(go.Pie(labels=labels, values=values), **cell)
+    elif chart.type == "line":
+        fig.add_trace(go.Scatter(x=labels, y=values, mode="lines+markers", line=dict(color=chart.color), showlegend=False), **cell)
+    else:
+        categories = _categories(chart.data)
+        base = [0.0] * len(categories)
+        for name, series in chart.data.items():
+            heights = [series.get(k, 0) for k in categories]
+            bar = go.Bar(x=categories, y=heights, name=str(name), legendgroup=str(name))
+            if chart.type == "stacked":
+                bar.update(offsetgroup=f"stack-{index}", base=list(base))
+                base = [b + (h or 0) for b, h in zip(base, heights)]
+            fig.add_trace(bar, **cell)
+
+    if chart.type != "pie":
+        fig.update_xaxes(title_text=chart.x_label, **cell)
+        fig.update_yaxes(title_text=chart.axis_title, **cell)
+        if chart.show_percentage:
+            fig.update_yaxes(tickformat=".0%", **cell)
+
+
+def build_figure(chart: ChartSpec) -> go.Figure:
+    """Draw one chart on a figure of its own."""
+    fig = go.Figure()
+    add_chart(fig, chart)
+    fig.update_layout(title=chart.title, barmode="group")
+    return fig
+
+
+def grid_shape(count: int, columns: int) -> Tuple[int, int]:
+    columns = max(1, min(columns, count))
+    return math.ceil(count / columns), columns
+
+
+def build_grid(charts: List[ChartSpec], columns: int = 2, title: str = "") -> go.Figure:
+    """
+    Draw several charts on one figure, filling a grid row by row.
+
+    Args:
+        charts: Charts to draw
+        columns: Number of charts per row
+        title: Title of the whole figure
+
+    Returns:
+        The figure, each chart titled above its cell
+    """
+    rows, columns = grid_shape(len(charts), columns)
+    cells = [[{"type": "xy"} for _ in range(columns)] for _ in range(rows)]
+    for i, chart in enumerate(charts):
+        if chart.type == "pie":
+            cells[i // columns][i % columns] = {"type": "domain"}
+    fig = make_subplots(rows=rows, cols=columns, specs=cells, subplot_titles=[chart.title for chart in charts])
+    for i, chart in enumerate(charts):
+        add_chart(fig, chart, index=i, row=i // columns + 1, col=i % columns + 1)
+    fig.update_layout(title=title, barmode="group")
+    return fig
+
+
+def check_output_format(output_format: str) -> None:
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"output_format must be one of {', '.join(OUTPUT_FORMATS)}")
+
+
+def check_scale(scale: Optional[float]) -> None:
+    if scale is not None and not 0 < scale <= MAX_IMAGE_SCALE:
+        raise ValueError(f"scale must be greater than 0 and at most {MAX_IMAGE_SCALE:g}")
+
+
+def _webp(png: bytes) -> bytes:
+    with Image.open(io.BytesIO(png)) as image:
+        buffer = io.BytesIO()
+        image.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=4)
+        return buffer.getvalue()
+
+
+def encode_figures(
+    figs: List[go.Figure],
+    output_format: str,
+    width: int = IMAGE_WIDTH,
+    height: int = IMAGE_HEIGHT,
+    scale: Optional[float] = None,
+) -> List[bytes]:
+    """
+    Encode figures in an output format.
+
+    JSON figures are serialized without rendering. SVG is vector, so it is
+    rendered at scale 1. WebP images are rendered as PNG and compressed with
+    Pillow when it is installed.
+
+    Args:
+        scale: Resolution multiplier of PNG and WebP images, None for IMAGE_SCALE
+
+    Returns:
+        The encoded figures, in the order of figs
+    """
+    check_output_format(output_format)
+    check_scale(scale)
+    scale = IMAGE_SCALE if scale is None else scale
+    if output_format == "json":
+        return [fig.to_json().encode("utf-8") for fig in figs]
+    if output_format == "svg":
+        return render_pool.render_many(figs, "svg", width, height, scale=1)
+    if output_format == "webp" and Image is None:
+        return render_pool.render_many(figs, "webp", width, height, scale)
+    images = render_pool.render_many(figs, "png", width, height, scale)
+    return [_webp(image) for image in images] if output_format == "webp" else images
+
+
+def _scale(output_format: str, scale: Optional[float] = None) -> Any:
+    # Part of the chart key for formats whose content depends on the resolution
+    if output_format not in ("png", "webp"):
+        return None
+    return IMAGE_SCALE if scale is None else scale
+
+
+def render_charts(
+    charts: List[ChartSpec], output_format: str = DEFAULT_OUTPUT_FORMAT, scale: Optional[float] = None
+) -> List[str]:
+    """
+    Render charts to separate files, in one batch.
+
+    Charts already rendered are served from the chart cache, the others are
+    rendered in parallel by the render pool.
+
+    Args:
+        charts: Charts to render
+        output_format: One of OUTPUT_FORMATS
+        scale: Resolution multiplier of PNG and WebP images, None for IMAGE_SCALE
+
+    Returns:
+        The file names, in the order of charts
+    """
+    check_output_format(output_format)
+    check_scale(scale)
+    keys = [chart_key("chart", asdict(chart), scale=_scale(output_format, scale)) for chart in charts]
+    names: List[Optional[str]] = [chart_cache.get(key, output_format) for key in keys]
+    missing = [i for i, name in enumerate(names) if name is None]
+    # Identical charts in one batch are rendered once
+    first: Dict[str, int] = {}
+    for i in missing:
+        first.setdefault(keys[i], i)
+    images = encode_figures([build_figure(charts[i]) for i in first.values()], output_format, scale=scale)
+    rendered = {key: chart_cache.put(key, output_format, image) for key, image in zip(first, images)}
+    return [name if name is not None else rendered[key] for name, key in zip(names, keys)]
+
+
+def render_grid(
+    charts: List[ChartSpec],
+    columns: int = 2,
+    title: str = "",
+    output_format: str = DEFAULT_OUTPUT_FORMAT,
+    scale: Optional[float] = None,
+) -> str:
+    """
+    Render charts as one grid figure.
+
+    Returns:
+        The file name
+    """
+    check_output_format(output_format)
+    check_scale(scale)
+    rows, columns = grid_shape(len(charts), columns)
+    key = chart_key(
+        "grid", [asdict(chart) for chart in charts], columns=columns, title=title, scale=_scale(output_format, scale)
+    )
+    cached = chart_cache.get(key, output_format)
+    if cached is not None:
+        return cached
+    height = max(IMAGE_HEIGHT, rows * GRID_ROW_HEIGHT)
+    fig = build_grid(charts, columns, title)
+    if output_format == "json":
+        # The frontend draws the figure at its own width, the rows keep their height
+        fig.update_layout(height=height)
+    return chart_cache.put(key, output_format, encode_figures([fig], output_format, IMAGE_WIDTH, height, scale)[0])
@@ -0,0 +1,113 @@
+import json
+import os
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Values treated as "no answer" in survey exports
+DEFAULT_SENTINELS: Tuple[Any, ...] = (999,)
+
+# Optional JSON file mapping file names to their own sentinel lists, e.g.
+# {"2024.xlsx": [999, "N/A"], "2025.xlsx": [-1]}
+SENTINELS_CONFIG = os.environ.get("EXCEL_SENTINELS_CONFIG")
+
+_sentinel_overrides: Optional[Dict[str, Any]] = None
+
+
+def sentinels_for(file_path: str) -> Tuple[Any, ...]:
+    """
+    Get the sentinel values configured for a file.
+
+    Args:
+        file_path: File name relative to the 'data/' directory
+
+    Returns:
+        Tuple of values to be replaced by NaN
+    """
+    global _sentinel_overrides
+    if _sentinel_overrides is None:
+        _sentinel_overrides = {}
+        if SENTINELS_CONFIG and os.path.exists(SENTINELS_CONFIG):
+            with open(SENTINELS_CONFIG, "r", encoding="utf-8") as f:
+                _sentinel_overrides = json.load(f)
+    return normalize_sentinels(_sentinel_overrides.get(file_path, DEFAULT_SENTINELS))
+
+
+def normalize_sentinels(sentinels: Iterable[Any]) -> Tuple[Any, ...]:
+    """Return sentinels as a hashable tuple, numbers before strings."""
+    numeric = sorted(v for v in sentinels if not isinstance(v, str))
+    text = sorted(v for v in sentinels if isinstance(v, str))
+    return tuple(numeric) + tuple(text)
+
+
+def _split_sentinels(sentinels: Iterable[Any]) -> Tuple[list, list]:
+    numeric = [v for v in sentinels if not isinstance(v, (str, bool))]
+    # A numeric sentinel also matches its text form, e.g. 999 and "999"
+    text = [v for v in sentinels if isinstance(v, str)] + [str(v) for v in numeric]
+    return numeric, text
+
+
+def _clean_value(value: Any, numeric: set, text: set) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        return np.nan if value == "" or value in text else value
+    if not isinstance(value, bool) and value in numeric:
+        return np.nan
+    return value
+
+
+def clean_column(series: pd.Series, sentinels: Iterable[Any] = DEFAULT_SENTINELS) -> pd.Series:
+    """
+    Clean a single column in one pass.
+
+    Strings are stripped, blank strings and sentinel values become NaN. Object
+    columns are factorized first so each distinct value is cleaned once, numeric
+    columns only get a vectorized sentinel check and other dtypes are returned
+    unchanged.
+
+    Args:
+        series: Column to clean
+        sentinels: Values to be replaced by NaN
+
+    Returns:
+        Cleaned column
+    """
+    numeric, text = _split_sentinels(sentinels)
+
+    if series.dtype == object:
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        numeric_set, text_set = set(numeric), set(text)
+        cleaned = np.empty(len(uniques) + 1, dtype=object)
+        cleaned[:-1] = [_clean_value(v, numeric_set, text_set) for v in uniques]
+        # Code -1 marks missing values and maps to the trailing NaN
+        cleaned[-1] = np.nan
+        values = cleaned.take(codes)
+        return pd.Series(values, index=series.index, name=series.name).infer_objects()
+
+    if numeric and pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        values = series.to_numpy()
+        mask = np.isin(values, numeric)
+        if mask.any():
+            values = values.astype(np.float64)
+            values[mask] = np.nan
+            return pd.Series(values, index=series.index, name=series.name)
+    return series
+
+
+def clean_frame(df: pd.DataFrame, sentinels: Iterable[Any] = DEFAULT_SENTINELS) -> pd.DataFrame:
+    """
+    Clean every column of a freshly parsed sheet.
+
+    Args:
+        df: DataFrame as returned by pd.read_excel
+        sentinels: Values to be replaced by NaN
+
+    Returns:
+        Cleaned DataFrame
+    """
+    sentinels = tuple(sentinels)
+    return pd.DataFrame(
+        {i: clean_column(df.iloc[:, i], sentinels) for i in range(df.shape[1])},
+        index=df.index,
+    ).set_axis(df.columns, axis=1)
@@ -0,0 +1,80 @@
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from compact import value_counts
+
+# Columns with more distinct values (free text, IDs) are not indexed
+INDEX_MAX_UNIQUE = int(os.environ.get("EXCEL_INDEX_MAX_UNIQUE", "10000"))
+
+
+@dataclass
+class ColumnSummary:
+    """Precomputed answers to unfiltered queries on one column."""
+
+    counts: List[Tuple[Any, int]]
+    nulls: int
+    unique_values: List[Any]
+
+    def distribution(self, normalize: bool = True, exclude: Any = None) -> Dict[Any, Any]:
+        """
+        Same result as value_counts on the column, without scanning it.
+
+        Args:
+            normalize: Whether to return shares instead of counts
+            exclude: Value to leave out (optional)
+
+        Returns:
+            Dict mapping values to counts or shares, most frequent first
+        """
+        counts = self.counts if exclude is None else [(k, v) for k, v in self.counts if k != exclude]
+        if not normalize:
+            return dict(counts)
+        total = sum(v for _, v in counts)
+        return {k: v / total for k, v in counts} if total else {}
+
+
+@dataclass
+class FileIndex:
+    """Per-column summaries of a file, None for columns too diverse to index."""
+
+    rows: int
+    columns: Dict[Any, Optional[ColumnSummary]]
+
+    def get(self, column: Any) -> Optional[ColumnSummary]:
+        return self.columns.get(column)
+
+
+def summarize_column(series: pd.Series) -> Optional[ColumnSummary]:
+    """
+    Compute the value counts, null count and unique values of a column.
+
+    Args:
+        series: Column to summarize
+
+    Returns:
+        The summary, or None if the column has more than INDEX_MAX_UNIQUE distinct values
+    """
+    if series.nunique(dropna=True) > INDEX_MAX_UNIQUE:
+        return None
+    counts = value_counts(series)
+    return ColumnSummary(
+        counts=list(zip(counts.index.tolist(), counts.tolist())),
+        nulls=int(series.isna().sum()),
+        unique_values=series.unique().tolist(),
+    )
+
+
+def build_index(df: pd.DataFrame) -> FileIndex:
+    """
+    Build the index of a cleaned DataFrame.
+
+    Args:
+        df: Cleaned DataFrame as returned by read_excel
+
+    Returns:
+        FileIndex covering every column
+    """
+    return FileIndex(rows=len(df), columns={col: summarize_column(df[col]) for col in df.columns})
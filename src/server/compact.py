@@ -0,0 +1,100 @@
+import os
+import threading
+from typing import Any, Dict, Tuple
+
+import pandas as pd
+
+# Set EXCEL_COMPACT=0 to keep the dtypes produced by the parser
+COMPACT_ENABLED = os.environ.get("EXCEL_COMPACT", "1") != "0"
+
+# Object columns are dictionary-encoded when they have at most this many
+# distinct values and the distinct values make up at most this share of rows
+CATEGORY_MAX_UNIQUE = int(os.environ.get("EXCEL_CATEGORY_MAX_UNIQUE", "1000"))
+CATEGORY_MAX_RATIO = float(os.environ.get("EXCEL_CATEGORY_MAX_RATIO", "0.5"))
+
+_memory_reports: Dict[str, Dict[str, Any]] = {}
+_reports_lock = threading.Lock()
+
+
+def compact_column(series: pd.Series) -> pd.Series:
+    """
+    Store a column in the smallest dtype that keeps its values.
+
+    Low-cardinality object columns become categoricals and integer columns are
+    downcast. Float columns are left as they are, since reductions over float32
+    lose precision.
+
+    Args:
+        series: Cleaned column
+
+    Returns:
+        Column with a compact dtype
+    """
+    if series.dtype == object:
+        non_null = series.count()
+        if non_null == 0:
+            return series
+        n_unique = series.nunique(dropna=True)
+        if n_unique <= CATEGORY_MAX_UNIQUE and n_unique <= non_null * CATEGORY_MAX_RATIO:
+            return series.astype("category")
+        return series
+
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+    return series
+
+
+def compact_frame(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    Convert every column of a cleaned frame to a compact dtype.
+
+    Args:
+        df: Cleaned DataFrame
+
+    Returns:
+        Tuple of the compact DataFrame and a report with the memory usage in
+        bytes "before" and "after" the conversion
+    """
+    before = int(df.memory_usage(deep=True).sum())
+    if not COMPACT_ENABLED:
+        return df, {"before": before, "after": before}
+    compacted = pd.DataFrame(
+        {i: compact_column(df.iloc[:, i]) for i in range(df.shape[1])},
+        index=df.index,
+    ).set_axis(df.columns, axis=1)
+    return compacted, {"before": before, "after": int(compacted.memory_usage(deep=True).sum())}
+
+
+def record_memory_report(file_path: str, report: Dict[str, int]) -> None:
+    """Remember the memory usage of a file before and after compaction."""
+    with _reports_lock:
+        _memory_reports[file_path] = dict(report)
+
+
+def memory_reports() -> Dict[str, Dict[str, Any]]:
+    """
+    Get the memory usage recorded for every loaded file.
+
+    Returns:
+        Dict mapping file names to their "before" and "after" sizes in bytes and the saved "ratio"
+    """
+    with _reports_lock:
+        return {
+            name: {**report, "ratio": report["after"] / report["before"] if report["before"] else 1.0}
+            for name, report in _memory_reports.items()
+        }
+
+
+def value_counts(series: pd.Series, normalize: bool = False) -> pd.Series:
+    """
+    value_counts that only reports values present in the series.
+
+    Categorical columns are counted on their codes, but pandas also lists
+    categories that no longer occur after filtering; those are dropped here.
+    """
+    counts = series.value_counts(normalize=normalize)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        counts = counts[counts > 0]
+    return counts
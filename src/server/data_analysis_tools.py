@@ -1,21 +1,132 @@
-import pandas as pd
-import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from fastmcp import FastMCP
 import json
-from utils import read_excel
+import os
+from concurrent.futures import ThreadPoolExecutor
+from utils import get_file_index, is_parsed, read_excel
+from compact import value_counts
+from distributions import (
+    CROSSTAB_NORMALIZE,
+    align_distributions,
+    binary_counts,
+    column_distribution,
+    crosstab_counts,
+    crosstab_result,
+    format_keys,
+    parse_column_specs,
+)
+from filters import FilterExpression, compile_filters, describe_filters, filter_columns, matching_rows
+from memo import memoize
+from payload import DEFAULT_ROUND_DIGITS, DEFAULT_TOP_K, bounded, paginate_distribution, top_values
+from prewarm import prewarmer
+from sampling import approximate_distribution
+from sql_engine import SQL_MAX_ROWS, run_query
+from streaming import (
+    should_stream,
+    stream_batch_distribution,
+    stream_binary_distribution,
+    stream_column_distribution,
+    stream_combined_distribution,
+    stream_crosstab_distribution,
+)
+
+# Threads computing the distributions of compare_files_distribution, however many files are compared
+COMPARE_WORKERS = int(os.environ.get("EXCEL_COMPARE_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+def _batch_distribution(
+    file_path: str,
+    specs: List[Tuple[Any, bool, Any]],
+    filter_column: str | None = None,
+    filter_value: Any = None,
+    expression: FilterExpression | None = None,
+    streaming: bool | None = None,
+) -> Dict[str, Any]:
+    """
+    Compute the distributions of several columns of a file with one shared filter.
+
+    Args:
+        file_path: File name relative to the 'data/' directory
+        specs: (column, normalize, exclude) tuples as returned by parse_column_specs
+        filter_column: Column to filter by (optional)
+        filter_value: Value to filter for (optional)
+        expression: Compiled filter expression (optional)
+        streaming: Read the file in chunks instead of loading it (default: only for very large files not parsed yet)
+
+    Returns:
+        Dict with the "distributions" by column, or an "error"
+    """
+    stream = should_stream(file_path, streaming)
+    column_names = [column for column, _, _ in specs]
+    distributions = {}
+    if (filter_column is None or filter_value is None) and expression is None and (not stream or is_parsed(file_path)):
+        # Columns covered by the precomputed index are not read at all
+        index = get_file_index(file_path)
+        for column, column_normalize, exclude in specs:
+            summary = index.get(column)
+            if column not in index.columns:
+                distributions[column] = {"error": f"Column {column} does not exist in the data."}
+            elif summary is not None and index.rows > 0:
+                distributions[column] = format_keys(summary.distribution(normalize=column_normalize, exclude=exclude))
+
+    remaining = [column for column in column_names if column not in distributions]
+    if remaining and stream:
+        streamed = stream_batch_distribution(
+            file_path, [spec for spec in specs if spec[0] in remaining], filter_column, filter_value, expression
+        )
+        if streamed["rows"] == 0:
+            return {"error": f"No rows found after filtering for {describe_filters(filter_column, filter_value, expression)}"}
+        distributions.update(streamed["distributions"])
+    elif remaining:
+        # The filter column is read as well, so the frame has rows even if no requested column exists
+        data = read_excel(
+            file_path, columns=remaining + ([filter_column] if filter_column else []) + filter_columns(expression)
+        )
+
+        # The filter is evaluated once and its rows are shared by every column
+        rows = matching_rows(file_path, data, filter_column, filter_value, expression)
+        if rows is not None:
+            data = data.take(rows)
+        if len(data) == 0:
+            return {"error": f"No rows found after filtering for {describe_filters(filter_column, filter_value, expression)}"}
+
+        for column, column_normalize, exclude in specs:
+            if column in distributions:
+                continue
+            if column not in data.columns:
+                distributions[column] = {"error": f"Column {column} does not exist in the data."}
+            else:
+                distributions[column] = column_distribution(data[column], column_normalize, exclude)
+
+    # Keep the order of the request
+    return {"distributions": {column: distributions[column] for column in column_names}}
+
+
+def _distribution_page(distribution: Dict[str, Any], top_k: int | None, cursor: str | None) -> Dict[str, Any]:
+    # Most frequent values first, the rest is summed up in the "other" bucket
+    page, meta = paginate_distribution(distribution, top_k, cursor)
+    return {"distribution": page, **meta}
+
 
 def register_tools(mcp: FastMCP):
 
     @mcp.tool()
+    @bounded
+    @memoize
     def get_column_distribution(
         file_path: str,
         column_name: str,
         filter_column: str | None = None,
         filter_value: str | int | None = None,
         normalize: bool = True,
-        exclude: float | int | None = None
-    ) -> Dict[str, Any]:   
+        exclude: float | int | None = None,
+        filters: str | None = None,
+        approximate: bool = False,
+        stratify_by: str | None = None,
+        top_k: int | None = DEFAULT_TOP_K,
+        cursor: str | None = None,
+        streaming: bool | None = None,
+        round_digits: int | None = DEFAULT_ROUND_DIGITS
+    ) -> Dict[str, Any]:
         """
         Get the distribution of a specified column.
         
@@ -25,110 +136,350 @@ def register_tools(mcp: FastMCP):
             filter_value: Value to filter for (optional)
             normalize: Whether to normalize the distribution
             exclude: Value to exclude from analysis
+            filters: JSON filter expression combining several conditions (optional), e.g.
+                {"and": [{"column": "gender", "op": "==", "value": "M"}, {"column": "school id", "op": "in", "value": [10, 11]}]}.
+                Operators: ==, !=, <, <=, >, >=, between ([low, high]), in, not_in, is_null, not_null;
+                conditions are combined with "and", "or" and "not"
+            approximate: Estimate the distribution from a fixed random sample of rows, with confidence
+                intervals, for a quick first look at very large files
+            stratify_by: Column whose values are sampled separately in approximate mode (optional)
+            top_k: Number of most frequent values to list, the others are summed up as "__other__"
+                (null for every value)
+            cursor: next_cursor of a previous result, to list the values that follow it (optional)
+            streaming: Read the file in chunks instead of loading it (default: only for very large files not parsed yet)
+            round_digits: Decimal places kept in shares and other floats (null for full precision)
             
         Returns:
-            JSON string containing the distribution
+            Dict with the distribution, the number of distinct values and, if more values
+            follow, the next_cursor; in approximate mode also the confidence intervals of every value
+            and a description of the sample
         """
         try:
-            data = read_excel(file_path)
+            expression = compile_filters(filters)
+
+            if approximate:
+                estimated = approximate_distribution(
+                    file_path, column_name, filter_column, filter_value, expression, normalize, exclude, stratify_by
+                )
+                if "error" in estimated:
+                    return {"error": f"{estimated['error']} for {describe_filters(filter_column, filter_value, expression)}"}
+                page, meta = paginate_distribution(estimated["distribution"], top_k, cursor)
+                intervals = {k: v for k, v in estimated["confidence_intervals"].items() if k in page}
+                return {"distribution": page, **meta, "confidence_intervals": intervals, "sample": estimated["sample"]}
+
+            stream = should_stream(file_path, streaming)
+            if (filter_column is None or filter_value is None) and expression is None and (not stream or is_parsed(file_path)):
+                # Unfiltered distributions are served from the precomputed column index
+                index = get_file_index(file_path)
+                summary = index.get(column_name)
+                if summary is not None and index.rows > 0:
+                    distribution = format_keys(summary.distribution(normalize=normalize, exclude=exclude))
+                    return _distribution_page(distribution, top_k, cursor)
+
+            if stream:
+                streamed = stream_column_distribution(
+                    file_path, column_name, filter_column, filter_value, normalize, exclude, expression
+                )
+                if streamed["rows"] == 0:
+                    return {"error": f"No rows found after filtering for {describe_filters(filter_column, filter_value, expression)}"}
+                return _distribution_page(streamed["distribution"], top_k, cursor)
+
+            data = read_excel(file_path, columns=[column_name] + filter_columns(expression))
+
+            if column_name not in data.columns:
+                return {"error": f"Column {column_name} does not exist in the data."}
+            target = data[column_name]
             
-            # Apply filtering
-            if filter_column is not None and filter_value is not None:
-                if isinstance(filter_column, str):
-                    data = data[data[filter_column] == filter_value]
+            # Apply filtering, only the matching rows of the target column are copied
+            rows = matching_rows(file_path, data, filter_column, filter_value, expression)
+            if rows is not None:
+                target = target.take(rows)
             
-            if len(data) == 0:
-                return {"error": f"No rows found after filtering for column {filter_column} == {filter_value}"}
+            if len(target) == 0:
+                return {"error": f"No rows found after filtering for {describe_filters(filter_column, filter_value, expression)}"}
             
-            # Apply exclusion
-            if exclude is not None:
-                data = data[data[column_name] != exclude]
+            # Calculate distribution without the excluded value
+            distribution = column_distribution(target, normalize=normalize, exclude=exclude)
+
+            return _distribution_page(distribution, top_k, cursor)
+
+        except Exception as e:
+            return {"error": f"Error calculating column distribution: {str(e)}"}
+
+
+
+    @mcp.tool()
+    @bounded
+    @memoize
+    def get_batch_distribution(
+        file_path: str,
+        columns: str,
+        filter_column: str | None = None,
+        filter_value: str | int | None = None,
+        normalize: bool = True,
+        filters: str | None = None,
+        streaming: bool | None = None,
+        top_k: int | None = DEFAULT_TOP_K,
+        round_digits: int | None = DEFAULT_ROUND_DIGITS
+    ) -> Dict[str, Any]:
+        """
+        Get the distributions of several columns in one call, with one shared filter.
+        
+        Args:
+            file_path: Path to the Excel file
+            columns: JSON string list of column names, or of objects setting options per column,
+                e.g. ["q1", {"column": "q2", "normalize": false, "exclude": 0}]
+            filter_column: Column to filter by (optional)
+            filter_value: Value to filter for (optional)
+            normalize: Whether to normalize the distributions, for columns that do not set it
+            filters: JSON filter expression combining several conditions (optional), see get_column_distribution
+            streaming: Read the file in chunks instead of loading it (default: only for very large files not parsed yet)
+            top_k: Number of most frequent values kept per column, the others are summed up in
+                "__other__" (null for every value)
+            round_digits: Decimal places kept in shares and other floats (null for full precision)
             
-            if column_name not in data.columns:
-                return {"error": f"Column {column_name} does not exist in the data."}
+        Returns:
+            Dict mapping each column to its distribution, or to an error for missing columns
+        """
+        try:
+            specs = parse_column_specs(json.loads(columns), normalize)
+            result = _batch_distribution(file_path, specs, filter_column, filter_value, compile_filters(filters), streaming)
+            if "error" in result:
+                return result
+            return {"distributions": top_values(result["distributions"], top_k)}
+
+        except Exception as e:
+            return {"error": f"Error calculating batch distribution: {str(e)}"}
+
+
+    @mcp.tool()
+    @bounded
+    @memoize
+    def get_crosstab_distribution(
+        file_path: str,
+        column_name: str,
+        group_by: str,
+        second_group_by: str | None = None,
+        normalize: str = "group",
+        exclude: float | int | None = None,
+        filter_column: str | None = None,
+        filter_value: str | int | None = None,
+        filters: str | None = None,
+        streaming: bool | None = None,
+        top_k: int | None = DEFAULT_TOP_K,
+        round_digits: int | None = DEFAULT_ROUND_DIGITS
+    ) -> Dict[str, Any]:
+        """
+        Get the distribution of a column for every value of one or two grouping columns,
+        e.g. the distribution of a question by school or by gender and school.
+        
+        Args:
+            file_path: Path to the Excel file
+            column_name: Name of the column to analyze
+            group_by: Column to group by
+            second_group_by: Second column to group by within each group (optional)
+            normalize: "group" for shares within each group, "overall" for shares of all counted
+                rows, "none" for counts
+            exclude: Value to exclude from analysis
+            filter_column: Column to filter by (optional)
+            filter_value: Value to filter for (optional)
+            filters: JSON filter expression combining several conditions (optional), see get_column_distribution
+            streaming: Read the file in chunks instead of loading it (default: only for very large files not parsed yet)
+            top_k: Number of most frequent values kept per group, the others are summed up in
+                "__other__" (null for every value)
+            round_digits: Decimal places kept in shares and other floats (null for full precision)
             
-            # Calculate distribution
-            data = data.dropna(subset=[column_name])
-            distribution = data[column_name].value_counts(normalize=normalize).to_dict()
-            distribution = {str(float(k)) if isinstance(k, int) else str(k): v for k, v in distribution.items()}
+        Returns:
+            Dict with the distributions nested by group value, and the number of
+            counted rows of each group
+        """
+        try:
+            groups = [group_by] + ([second_group_by] if second_group_by else [])
+            if column_name in groups or len(set(groups)) != len(groups):
+                return {"error": "The analyzed column and the grouping columns must all be different."}
+            if normalize not in CROSSTAB_NORMALIZE:
+                return {"error": f"normalize must be one of {', '.join(CROSSTAB_NORMALIZE)}"}
+            expression = compile_filters(filters)
+
+            if should_stream(file_path, streaming):
+                streamed = stream_crosstab_distribution(
+                    file_path, column_name, groups, exclude, filter_column, filter_value, expression
+                )
+                if streamed["rows"] == 0:
+                    return {"error": f"No rows found after filtering for {describe_filters(filter_column, filter_value, expression)}"}
+                counts = streamed["counts"]
+            else:
+                data = read_excel(
+                    file_path,
+                    columns=[column_name] + groups + ([filter_column] if filter_column else []) + filter_columns(expression),
+                )
+                for col in [column_name] + groups:
+                    if col not in data.columns:
+                        return {"error": f"Column {col} does not exist in the data."}
 
-            return {"distribution": json.dumps(distribution, ensure_ascii=False, indent=2)}
+                # Apply filtering
+                rows = matching_rows(file_path, data, filter_column, filter_value, expression)
+                if rows is not None:
+                    data = data.take(rows)
+                if len(data) == 0:
+                    return {"error": f"No rows found after filtering for {describe_filters(filter_column, filter_value, expression)}"}
+
+                # One grouped count covers every group
+                counts = crosstab_counts(data, column_name, groups, exclude).to_dict()
+
+            distribution, group_sizes = crosstab_result(counts, normalize)
+            return {"distribution": top_values(distribution, top_k), "group_sizes": group_sizes}
 
         except Exception as e:
-            return {"error": f"Error calculating column distribution: {str(e)}"}
+            return {"error": f"Error calculating crosstab distribution: {str(e)}"}
 
 
+    @mcp.tool()
+    @bounded
+    @memoize
+    def compare_files_distribution(
+        file_paths: str,
+        columns: str,
+        filter_column: str | None = None,
+        filter_value: str | int | None = None,
+        normalize: bool = True,
+        filters: str | None = None,
+        round_digits: int | None = DEFAULT_ROUND_DIGITS
+    ) -> Dict[str, Any]:
+        """
+        Get the same distributions from several files side by side, e.g. to compare 2024.xlsx with 2025.xlsx.
+        
+        Args:
+            file_paths: JSON string list of file names
+            columns: JSON string list of column names, or of objects setting options per column,
+                see get_batch_distribution
+            filter_column: Column to filter by in every file (optional)
+            filter_value: Value to filter for (optional)
+            normalize: Whether to normalize the distributions, for columns that do not set it
+            filters: JSON filter expression combining several conditions (optional), see get_column_distribution
+            round_digits: Decimal places kept in shares and other floats (null for full precision)
+            
+        Returns:
+            Dict mapping each file to the distributions of its columns, every file lists
+            the same values for a column with 0 for the values it does not have
+        """
+        try:
+            files = list(dict.fromkeys(json.loads(file_paths)))
+            if not files:
+                return {"error": "file_paths must be a non-empty list"}
+            specs = parse_column_specs(json.loads(columns), normalize)
+            expression = compile_filters(filters)
+
+            # Workbooks that are not cached yet are parsed by worker processes at the same time
+            parse_errors = prewarmer.parse_now(
+                [f for f in files if os.path.isfile(os.path.join("data/", f)) and not should_stream(f)]
+            )
+
+            def compute(file_path: str) -> Dict[str, Any]:
+                if file_path in parse_errors:
+                    return {"error": f"Error reading Excel file: {parse_errors[file_path]}"}
+                try:
+                    return _batch_distribution(file_path, specs, filter_column, filter_value, expression)
+                except Exception as e:
+                    return {"error": str(e)}
+
+            with ThreadPoolExecutor(max_workers=max(1, min(len(files), COMPARE_WORKERS))) as pool:
+                results = dict(zip(files, pool.map(compute, files)))
+
+            aligned = align_distributions(
+                {f: result["distributions"] for f, result in results.items() if "error" not in result}
+            )
+            comparison = {f: aligned[f] if f in aligned else {"error": results[f]["error"]} for f in files}
+            return {"distributions": comparison}
+
+        except Exception as e:
+            return {"error": f"Error comparing files: {str(e)}"}
+
 
     @mcp.tool()
+    @bounded
+    @memoize
     def get_binary_distribution(
+        file_path: str,
         columns: str,
         value: int = 1,
         unique: bool = False,
         filter_column: str | None = None,
-        filter_value: str | int | None = None
+        filter_value: str | int | None = None,
+        filters: str | None = None,
+        streaming: bool | None = None,
+        round_digits: int | None = DEFAULT_ROUND_DIGITS
     ) -> Dict[str, Any]:
         """
         Get the binary distribution for specified columns.
         
         Args:
+            file_path: Path to the Excel file
             columns: JSON string list of column names
             value: Target value to count (default: 1)
             unique: Whether to ensure only one target value per row
             filter_column: Column to filter by (optional)
             filter_value: Value to filter for (optional)
+            filters: JSON filter expression combining several conditions (optional), see get_column_distribution
+            streaming: Read the file in chunks instead of loading it (default: only for very large files not parsed yet)
+            round_digits: Decimal places kept in shares and other floats (null for full precision)
             
         Returns:
-            JSON string containing the binary distribution
+            Dict with the share of rows holding the target value in each column
         """
-        data = read_excel(file_path)
-
         try:
             columns_list = json.loads(columns)
+            expression = compile_filters(filters)
+
+            if should_stream(file_path, streaming):
+                streamed = stream_binary_distribution(
+                    file_path, columns_list, value, unique, filter_column, filter_value, expression
+                )
+                if streamed["rows"] == 0:
+                    return {"error": f"No rows found after filtering for {describe_filters(filter_column, filter_value, expression)}"}
+                return {"result": streamed["result"]}
+
+            data = read_excel(file_path, columns=columns_list + filter_columns(expression))
             
             # Apply filtering
-            if filter_column is not None and filter_value is not None:
-                data = data[data[filter_column] == filter_value]
+            rows = matching_rows(file_path, data, filter_column, filter_value, expression)
+            if rows is not None:
+                data = data.take(rows)
             
-            data = data.dropna(subset=columns_list)
+            present = [col for col in columns_list if col in data.columns]
+            data = data.dropna(subset=present)
             
             if len(data) == 0:
-                return {"error": f"No rows found after filtering for column {filter_column} == {filter_value}"}
+                return {"error": f"No rows found after filtering for {describe_filters(filter_column, filter_value, expression)}"}
 
-            result = {}
-            
-            # Drop rows where more than one target value exists in the specified columns
-            if unique:
-                target_mask = data[columns_list].apply(
-                    lambda row: (pd.to_numeric(row, errors='coerce') == value).sum(), axis=1
-                )
-                data = data[target_mask <= 1]
-            
-            for col in columns_list:
-                if col not in data.columns:
-                    result[col] = 0.0
-                else:
-                    # Count the number of target values in each column
-                    numeric_col = pd.to_numeric(data[col], errors='coerce').fillna(0)
-                    count = int((numeric_col == value).sum())
-                    result[col] = count / len(data) if len(data) > 0 else 0.0
+            # Count the target values of all columns at once, in unique mode only
+            # rows with at most one target value are counted
+            counts, rows = binary_counts(data, present, value, unique)
+            counts = dict(zip(present, counts.tolist()))
+            result = {col: counts[col] / rows if col in counts and rows > 0 else 0.0 for col in columns_list}
             
             if unique and sum(result.values()) > 0:
                 # Normalize so the sum of result is 1.0
                 total = sum(result.values())
                 result = {k: v / total for k, v in result.items()}
 
-            return {"result": json.dumps(result, ensure_ascii=False, indent=2)}
+            return {"result": result}
 
         except Exception as e:
             return {"error": f"Error calculating binary distribution: {str(e)}"}
 
 
     @mcp.tool()
+    @bounded
+    @memoize
     def get_combined_distribution(
         file_path: str,
         columns: str,
         filtered_column: str | None = None,
-        filter_value: str | int | None = None
+        filter_value: str | int | None = None,
+        filters: str | None = None,
+        streaming: bool | None = None,
+        round_digits: int | None = DEFAULT_ROUND_DIGITS
     ) -> Dict[str, Any]:
         """
         Get the normalized combined distribution of multiple specified columns, suitable for columns
@@ -138,28 +489,52 @@ def register_tools(mcp: FastMCP):
             columns: JSON string list of column names
             filtered_column: Column to filter by (optional)
             filter_value: Value to filter for (optional)
+            filters: JSON filter expression combining several conditions (optional), see get_column_distribution
+            streaming: Read the file in chunks instead of loading it (default: only for very large files not parsed yet)
+            round_digits: Decimal places kept in shares and other floats (null for full precision)
             
         Returns:
-            JSON string containing the combined distribution
+            Dict with the combined distribution
         """
-        data = read_excel(file_path)
-
         try:
             columns_list = json.loads(columns)
+            expression = compile_filters(filters)
+
+            if should_stream(file_path, streaming):
+                streamed = stream_combined_distribution(file_path, columns_list, filtered_column, filter_value, expression)
+                if streamed["rows"] == 0:
+                    return {"error": f"No rows found after filtering for {describe_filters(filtered_column, filter_value, expression)}"}
+                return {"result": streamed["result"]}
+
+            if (filtered_column is None or filter_value is None) and expression is None:
+                # Unfiltered counts are served from the precomputed column index
+                index = get_file_index(file_path)
+                summaries = [index.get(col) for col in columns_list if col in index.columns]
+                if index.rows > 0 and all(summary is not None for summary in summaries):
+                    result = {}
+                    for summary in summaries:
+                        for key, value in summary.counts:
+                            result[key] = result.get(key, 0) + value
+                    result = {k: v / index.rows for k, v in result.items()}
+                    result = dict(sorted(result.items(), key=lambda item: item[1], reverse=True))
+                    return {"result": result}
+
+            data = read_excel(file_path, columns=columns_list + filter_columns(expression))
             
             # Apply filtering
-            if filtered_column is not None and filter_value is not None:
-                data = data[data[filtered_column] == filter_value]
+            rows = matching_rows(file_path, data, filtered_column, filter_value, expression)
+            if rows is not None:
+                data = data.take(rows)
             
             if len(data) == 0:
-                return {"error": f"No rows found after filtering for column {filtered_column} == {filter_value}"}
+                return {"error": f"No rows found after filtering for {describe_filters(filtered_column, filter_value, expression)}"}
 
             result = {}
             total_count = len(data)
             
             for col in columns_list:
                 if col in data.columns:
-                    distribution = data[col].value_counts().to_dict()
+                    distribution = value_counts(data[col]).to_dict()
                     for key, value in distribution.items():
                         result[key] = result.get(key, 0) + value
                 else:
@@ -170,9 +545,40 @@ def register_tools(mcp: FastMCP):
                 result = {k: v / total_count for k, v in result.items()}
                 result = dict(sorted(result.items(), key=lambda item: item[1], reverse=True))
 
-            return {"result": json.dumps(result, ensure_ascii=False, indent=2)}
+            return {"result": result}
 
         except Exception as e:
             return {"error": f"Error calculating combined distribution: {str(e)}"}
 
 
+    @mcp.tool()
+    @bounded
+    def query_data(
+        query: str,
+        max_rows: int = SQL_MAX_ROWS,
+        round_digits: int | None = DEFAULT_ROUND_DIGITS
+    ) -> Dict[str, Any]:
+        """
+        Run a read-only SQL query (DuckDB dialect) over the Excel files, for questions the other
+        tools cannot answer in one call, e.g. aggregations over several columns, joins between files
+        or rankings.
+        
+        Every file is a table named after the file, with or without its extension. Quote names that
+        are not plain identifiers, e.g. SELECT "school id", AVG("中文成績") FROM "2024" GROUP BY 1
+        
+        Args:
+            query: A single SELECT statement
+            max_rows: Most rows to return, at most the server limit
+            round_digits: Decimal places kept in floats (null for full precision)
+            
+        Returns:
+            Dict with the result columns, the rows as lists, the files the tables were read from and
+            more_rows set when rows were left out
+        """
+        try:
+            if max_rows < 1:
+                return {"error": "max_rows must be at least 1"}
+            return run_query(query, min(max_rows, SQL_MAX_ROWS))
+
+        except Exception as e:
+            return {"error": f"Error running query: {str(e)}"}
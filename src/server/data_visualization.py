@@ -1,389 +1,296 @@
 import pandas as pd
 import numpy as np
 import json
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
 from typing import List, Dict, Any, Optional
 from fastmcp import FastMCP
-import base64
-import tempfile
+from charts import (
+    CHART_LAYOUTS,
+    DEFAULT_OUTPUT_FORMAT,
+    ChartSpec,
+    check_output_format,
+    check_scale,
+    load_chart_data,
+    render_charts,
+    render_grid,
+)
+
+
+def _draw(spec: Dict[str, Any], data_name: str, output_format: str, scale: Optional[float] = None) -> Dict[str, Any]:
+    # Shared by the single-chart tools, every chart goes through the chart engine
+    try:
+        check_output_format(output_format)
+        check_scale(scale)
+        chart = ChartSpec.from_dict(spec)
+    except json.JSONDecodeError as e:
+        return {"error": f"Invalid JSON format in {data_name}: {str(e)}"}
+    except ValueError as e:
+        return {"error": str(e)}
+    try:
+        # Return just the file name, named after the chart's content, for cross-platform compatibility
+        return {"image_path": render_charts([chart], output_format, scale)[0]}
+    except Exception as e:
+        return {"error": f"Error creating chart: {str(e)}"}
 
 
 def register_tools(mcp: FastMCP):
-    
+
     @mcp.tool()
     def visualize_column_distribution(
-        distribution_data: str,
+        distribution_data: Dict[str, Any] | str,
         chart_type: str = "bar",
         title: str = "Column Distribution",
         x_label: str = "Categories",
         y_label: str = "Values",
         color: str = "#1f77b4",
-        show_percentage: bool = False
+        show_percentage: bool = False,
+        output_format: str = DEFAULT_OUTPUT_FORMAT,
+        scale: float | None = None
     ) -> Dict[str, Any]:
         """
         Create a chart from column distribution data.
-        
+
         Args:
-            distribution_data: JSON string containing the distribution data
+            distribution_data: Dict (or JSON string) with the distribution data
             chart_type: Type of chart ("bar", "pie", "line")
             title: Chart title
             x_label: Label for x-axis
             y_label: Label for y-axis
             color: Color for the chart elements (hex code or name)
             show_percentage: Whether to show y-axis as percentages
-            
+            output_format: "png", "svg" (vector, smallest for simple charts), "webp" (compressed) or
+                "json" (a plotly figure the chat draws itself, fastest)
+            scale: Resolution multiplier of PNG and WebP images, e.g. 1 for 1200x800 pixels
+                (default: the server's EXCEL_IMAGE_SCALE)
+
         Returns:
-            Dict with the image path
+            Dict with the path of the image, or of the JSON figure
         """
-        try:
-            # Parse the distribution data
-            distribution = json.loads(distribution_data)
-            
-            # Extract keys and values
-            labels = list(distribution.keys())
-            values = list(distribution.values())
-            
-            # Create the chart based on type
-            if chart_type == "bar":
-                fig = go.Figure(data=[go.Bar(
-                    x=labels,
-                    y=values,
-                    marker_color=color
-                )])
-                fig.update_layout(
-                    title=title,
-                    xaxis_title=x_label,
-                    yaxis_title=y_label
-                )
-            elif chart_type == "pie":
-                fig = go.Figure(data=[go.Pie(
-                    labels=labels,
-                    values=values
-                )])
-                fig.update_layout(title=title)
-            elif chart_type == "line":
-                fig = go.Figure(data=go.Scatter(
-                    x=labels,
-                    y=values,
-                    mode='lines+markers',
-                    line=dict(color=color)
-                ))
-                fig.update_layout(
-                    title=title,
-                    xaxis_title=x_label,
-                    yaxis_title=y_label
-                )
-            else:
-                return {"error": f"Unsupported chart type: {chart_type}"}
-            
-            # Format y-axis as percentage if requested
-            if show_percentage:
-                fig.update_yaxes(tickformat=".0%")
-                # Update y-axis title if not customized
-                if y_label == "Values":
-                    fig.update_layout(yaxis_title="Percentage")
-            
-            # Convert to PNG with higher resolution
-            img_bytes = fig.to_image(
-                format="png",
-                width=1200,
-                height=800,
-                scale=2  # This doubles the resolution (2x)
-            )
-
-            temp_file = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
-            temp_file.write(img_bytes)
-            temp_file.close()
-
-            # Return just the basename of the file for cross-platform compatibility
-            import os
-            return {"image_path": os.path.basename(temp_file.name)}
-
-            # encoded = base64.b64encode(img_bytes).decode('utf-8')
-            # return {"image": encoded}
-            
-        except json.JSONDecodeError as e:
-            return {"error": f"Invalid JSON format in distribution_data: {str(e)}"}
-        except Exception as e:
-            return {"error": f"Error creating chart: {str(e)}"}
+        return _draw(
+            {
+                "data": distribution_data,
+                "type": chart_type,
+                "title": title,
+                "x_label": x_label,
+                "y_label": y_label,
+                "color": color,
+                "show_percentage": show_percentage,
+            },
+            "distribution_data",
+            output_format,
+            scale,
+        )
 
 
     @mcp.tool()
     def visualize_binary_distribution(
-        binary_data: str,
+        binary_data: Dict[str, Any] | str,
         chart_type: str = "bar",
         title: str = "Binary Distribution",
         x_label: str = "Columns",
         y_label: str = "Proportion",
         color: str = "#1f77b4",
-        show_percentage: bool = False
+        show_percentage: bool = False,
+        output_format: str = DEFAULT_OUTPUT_FORMAT,
+        scale: float | None = None
     ) -> Dict[str, Any]:
         """
         Create a chart from binary distribution data.
-        
+
         Args:
-            binary_data: JSON string containing the binary distribution data
+            binary_data: Dict (or JSON string) with the binary distribution data
             chart_type: Type of chart ("bar", "pie", "line")
             title: Chart title
             x_label: Label for x-axis
             y_label: Label for y-axis
             color: Color for the chart elements (hex code or name)
             show_percentage: Whether to show y-axis as percentages
-            
+            output_format: "png", "svg" (vector, smallest for simple charts), "webp" (compressed) or
+                "json" (a plotly figure the chat draws itself, fastest)
+            scale: Resolution multiplier of PNG and WebP images, e.g. 1 for 1200x800 pixels
+                (default: the server's EXCEL_IMAGE_SCALE)
+
         Returns:
-            Dict with the image path
+            Dict with the path of the image, or of the JSON figure
         """
-        try:
-            # Parse the binary distribution data
-            data = json.loads(binary_data)
-            
-            # Extract keys and values
-            labels = list(data.keys())
-            values = list(data.values())
-            
-            # Create the chart based on type
-            if chart_type == "bar":
-                fig = go.Figure(data=[go.Bar(
-                    x=labels,
-                    y=values,
-                    marker_color=color
-                )])
-                fig.update_layout(
-                    title=title,
-                    xaxis_title=x_label,
-                    yaxis_title=y_label
-                )
-            elif chart_type == "pie":
-                fig = go.Figure(data=[go.Pie(
-                    labels=labels,
-                    values=values
-                )])
-                fig.update_layout(title=title)
-            elif chart_type == "line":
-                fig = go.Figure(data=go.Scatter(
-                    x=labels,
-                    y=values,
-                    mode='lines+markers',
-                    line=dict(color=color)
-                ))
-                fig.update_layout(
-                    title=title,
-                    xaxis_title=x_label,
-                    yaxis_title=y_label
-                )
-            else:
-                return {"error": f"Unsupported chart type: {chart_type}"}
-            
-            # Format y-axis as percentage if requested
-            if show_percentage:
-                fig.update_yaxes(tickformat=".0%")
-                # Update y-axis title if not customized
-                if y_label == "Proportion" or y_label == "Values":
-                    fig.update_layout(yaxis_title="Percentage")
-            
-            # Convert to PNG with higher resolution
-            img_bytes = fig.to_image(
-                format="png",
-                width=1200,
-                height=800,
-                scale=2  # This doubles the resolution (2x)
-            )
-
-            temp_file = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
-            temp_file.write(img_bytes)
-            temp_file.close()
-
-            # Return just the basename of the file for cross-platform compatibility
-            import os
-            return {"image_path": os.path.basename(temp_file.name)}
-            
-        except json.JSONDecodeError as e:
-            return {"error": f"Invalid JSON format in binary_data: {str(e)}"}
-        except Exception as e:
-            return {"error": f"Error creating chart: {str(e)}"}
+        return _draw(
+            {
+                "data": binary_data,
+                "type": chart_type,
+                "title": title,
+                "x_label": x_label,
+                "y_label": y_label,
+                "color": color,
+                "show_percentage": show_percentage,
+            },
+            "binary_data",
+            output_format,
+            scale,
+        )
 
 
     @mcp.tool()
     def visualize_combined_distribution(
-        combined_data: str,
+        combined_data: Dict[str, Any] | str,
         chart_type: str = "bar",
         title: str = "Combined Distribution",
         x_label: str = "Categories",
         y_label: str = "Values",
         color: str = "#1f77b4",
-        show_percentage: bool = False
+        show_percentage: bool = False,
+        output_format: str = DEFAULT_OUTPUT_FORMAT,
+        scale: float | None = None
     ) -> Dict[str, Any]:
         """
         Create a chart from combined distribution data.
-        
+
         Args:
-            combined_data: JSON string containing the combined distribution data
+            combined_data: Dict (or JSON string) with the combined distribution data
             chart_type: Type of chart ("bar", "pie", "line")
             title: Chart title
             x_label: Label for x-axis
             y_label: Label for y-axis
             color: Color for the chart elements (hex code or name)
             show_percentage: Whether to show y-axis as percentages
-            
+            output_format: "png", "svg" (vector, smallest for simple charts), "webp" (compressed) or
+                "json" (a plotly figure the chat draws itself, fastest)
+            scale: Resolution multiplier of PNG and WebP images, e.g. 1 for 1200x800 pixels
+                (default: the server's EXCEL_IMAGE_SCALE)
+
         Returns:
-            Dict with the image path
+            Dict with the path of the image, or of the JSON figure
         """
-        try:
-            # Parse the combined distribution data
-            data = json.loads(combined_data)
-            
-            # Extract keys and values
-            labels = list(data.keys())
-            values = list(data.values())
-            
-            # Create the chart based on type
-            if chart_type == "bar":
-                fig = go.Figure(data=[go.Bar(
-                    x=labels,
-                    y=values,
-                    marker_color=color
-                )])
-                fig.update_layout(
-                    title=title,
-                    xaxis_title=x_label,
-                    yaxis_title=y_label
-                )
-            elif chart_type == "pie":
-                fig = go.Figure(data=[go.Pie(
-                    labels=labels,
-                    values=values
-                )])
-                fig.update_layout(title=title)
-            elif chart_type == "line":
-                fig = go.Figure(data=go.Scatter(
-                    x=labels,
-                    y=values,
-                    mode='lines+markers',
-                    line=dict(color=color)
-                ))
-                fig.update_layout(
-                    title=title,
-                    xaxis_title=x_label,
-                    yaxis_title=y_label
-                )
-            else:
-                return {"error": f"Unsupported chart type: {chart_type}"}
-            
-            # Format y-axis as percentage if requested
-            if show_percentage:
-                fig.update_yaxes(tickformat=".0%")
-                # Update y-axis title if not customized
-                if y_label == "Values":
-                    fig.update_layout(yaxis_title="Percentage")
-            
-            # Convert to PNG with higher resolution
-            img_bytes = fig.to_image(
-                format="png",
-                width=1200,
-                height=800,
-                scale=2  # This doubles the resolution (2x)
-            )
-
-            temp_file = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
-            temp_file.write(img_bytes)
-            temp_file.close()
-
-            # Return just the basename of the file for cross-platform compatibility
-            import os
-            return {"image_path": os.path.basename(temp_file.name)}
-            
-        except json.JSONDecodeError as e:
-            return {"error": f"Invalid JSON format in combined_data: {str(e)}"}
-        except Exception as e:
-            return {"error": f"Error creating chart: {str(e)}"}
+        return _draw(
+            {
+                "data": combined_data,
+                "type": chart_type,
+                "title": title,
+                "x_label": x_label,
+                "y_label": y_label,
+                "color": color,
+                "show_percentage": show_percentage,
+            },
+            "combined_data",
+            output_format,
+            scale,
+        )
 
 
     @mcp.tool()
     def compare_distributions(
-        distribution1: str,
-        distribution2: str,
+        distribution1: Dict[str, Any] | str,
+        distribution2: Dict[str, Any] | str,
         label1: str = "Distribution 1",
         label2: str = "Distribution 2",
         title: str = "Distribution Comparison",
         x_label: str = "Categories",
         y_label: str = "Values",
-        show_percentage: bool = False
+        show_percentage: bool = False,
+        output_format: str = DEFAULT_OUTPUT_FORMAT,
+        scale: float | None = None
     ) -> Dict[str, Any]:
         """
         Create a comparison chart from two distribution datasets.
-        
+
         Args:
-            distribution1: JSON string containing the first distribution data
-            distribution2: JSON string containing the second distribution data
+            distribution1: Dict (or JSON string) with the first distribution data
+            distribution2: Dict (or JSON string) with the second distribution data
             label1: Label for the first distribution
             label2: Label for the second distribution
             title: Chart title
             x_label: Label for x-axis
             y_label: Label for y-axis
             show_percentage: Whether to show y-axis as percentages
-            
+            output_format: "png", "svg" (vector, smallest for simple charts), "webp" (compressed) or
+                "json" (a plotly figure the chat draws itself, fastest)
+            scale: Resolution multiplier of PNG and WebP images, e.g. 1 for 1200x800 pixels
+                (default: the server's EXCEL_IMAGE_SCALE)
+
         Returns:
-            Dict with the image path
+            Dict with the path of the image, or of the JSON figure
         """
         try:
             # Parse the distribution data
-            data1 = json.loads(distribution1)
-            data2 = json.loads(distribution2)
-            
-            # Get all unique keys from both distributions
-            all_keys = set(data1.keys()) | set(data2.keys())
-            sorted_keys = sorted(all_keys)
-            
-            # Extract values for each distribution, using 0 for missing keys
-            values1 = [data1.get(key, 0) for key in sorted_keys]
-            values2 = [data2.get(key, 0) for key in sorted_keys]
-            
-            # Create the comparison bar chart
-            fig = go.Figure()
-            fig.add_trace(go.Bar(
-                x=sorted_keys,
-                y=values1,
-                name=label1
-            ))
-            fig.add_trace(go.Bar(
-                x=sorted_keys,
-                y=values2,
-                name=label2
-            ))
-            
-            fig.update_layout(
-                title=title,
-                xaxis_title=x_label,
-                yaxis_title=y_label,
-                barmode='group'
-            )
-            
-            # Format y-axis as percentage if requested
-            if show_percentage:
-                fig.update_yaxes(tickformat=".0%")
-                # Update y-axis title if not customized
-                if y_label == "Values":
-                    fig.update_layout(yaxis_title="Percentage")
-            
-            # Convert to PNG with higher resolution
-            img_bytes = fig.to_image(
-                format="png",
-                width=1200,
-                height=800,
-                scale=2  # This doubles the resolution (2x)
-            )
-
-            temp_file = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
-            temp_file.write(img_bytes)
-            temp_file.close()
+            data1 = load_chart_data(distribution1)
+            data2 = load_chart_data(distribution2)
 
-            # Return just the basename of the file for cross-platform compatibility
-            import os
-            return {"image_path": os.path.basename(temp_file.name)}
-             
+            # Get all unique keys from both distributions, using 0 for missing keys
+            sorted_keys = sorted(set(data1.keys()) | set(data2.keys()))
+            if label2 == label1:
+                # Series are keyed by label, equal labels would draw a single series
+                label2 = f"{label2} (2)"
+            series = {
+                label1: {key: data1.get(key, 0) for key in sorted_keys},
+                label2: {key: data2.get(key, 0) for key in sorted_keys},
+            }
         except json.JSONDecodeError as e:
             return {"error": f"Invalid JSON format in distribution data: {str(e)}"}
         except Exception as e:
-            return {"error": f"Error creating comparison chart: {str(e)}"}
\ No newline at end of file
+            return {"error": f"Error creating comparison chart: {str(e)}"}
+
+        return _draw(
+            {
+                "data": series,
+                "type": "grouped",
+                "title": title,
+                "x_label": x_label,
+                "y_label": y_label,
+                "color": None,
+                "show_percentage": show_percentage,
+            },
+            "distribution data",
+            output_format,
+            scale,
+        )
+
+
+    @mcp.tool()
+    def visualize_charts(
+        charts: List[Dict[str, Any]] | str,
+        layout: str = "separate",
+        columns: int = 2,
+        title: str = "",
+        output_format: str = DEFAULT_OUTPUT_FORMAT,
+        scale: float | None = None
+    ) -> Dict[str, Any]:
+        """
+        Create several charts in one call, e.g. for a report or a dashboard, as separate images
+        or as one grid image.
+
+        Args:
+            charts: List (or JSON string list) of chart specs, each with:
+                data: distribution data, e.g. the "distribution" of a get_column_distribution result;
+                    for "grouped" and "stacked" charts, series names mapped to distributions,
+                    e.g. {"2024": {...}, "2025": {...}}
+                type: "bar", "pie", "line", "grouped" or "stacked" (default "bar")
+                title, x_label, y_label, color, show_percentage: as for visualize_column_distribution
+            layout: "separate" for one image per chart, "grid" for one image with every chart
+            columns: Number of charts per row of the grid
+            title: Title of the grid image
+            output_format: "png", "svg" (vector, smallest for simple charts), "webp" (compressed) or
+                "json" (a plotly figure the chat draws itself, fastest)
+            scale: Resolution multiplier of PNG and WebP images, e.g. 1 for 1200x800 pixels
+                (default: the server's EXCEL_IMAGE_SCALE)
+
+        Returns:
+            Dict with the image_paths of the charts, in order, or the image_path of the grid
+        """
+        try:
+            specs = load_chart_data(charts)
+            if not isinstance(specs, list) or not specs:
+                return {"error": "charts must be a non-empty list of chart specs"}
+            if layout not in CHART_LAYOUTS:
+                return {"error": f"layout must be one of {', '.join(CHART_LAYOUTS)}"}
+            check_output_format(output_format)
+            check_scale(scale)
+            parsed = [ChartSpec.from_dict(spec) for spec in specs]
+        except json.JSONDecodeError as e:
+            return {"error": f"Invalid JSON format in charts: {str(e)}"}
+        except ValueError as e:
+            return {"error": str(e)}
+
+        try:
+            if layout == "grid":
+                return {"image_path": render_grid(parsed, columns, title, output_format, scale)}
+            return {"image_paths": render_charts(parsed, output_format, scale)}
+        except Exception as e:
+            return {"error": f"Error creating charts: {str(e)}"}
@@ -0,0 +1,184 @@
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from compact import value_counts
+
+
+def binary_counts(data: pd.DataFrame, columns: List[Any], value: Any = 1, unique: bool = False) -> Tuple[np.ndarray, int]:
+    """
+    Count the rows holding a target value in each of several columns.
+
+    Each column is converted to numbers once and compared into one boolean
+    matrix, so the unique mode and the counts are array operations.
+
+    Args:
+        data: Frame holding the columns, rows with missing values already dropped
+        columns: Columns to count
+        value: Target value to count
+        unique: Only count rows holding the target value in at most one column
+
+    Returns:
+        Tuple of the per-column counts and the number of rows counted
+    """
+    # Column-major, so each column is written and counted contiguously
+    hits = np.empty((len(data), len(columns)), dtype=bool, order="F")
+    # Text answers are counted as 0, but never make a row hold more than one target value
+    counted = hits if value != 0 else np.empty_like(hits, order="F")
+    for i, col in enumerate(columns):
+        numeric = pd.to_numeric(data[col], errors="coerce")
+        hits[:, i] = np.asarray(numeric == value, dtype=bool)
+        if counted is not hits:
+            counted[:, i] = np.asarray(numeric.fillna(0) == value, dtype=bool)
+    if unique:
+        counted = counted[hits.sum(axis=1) <= 1]
+    return counted.sum(axis=0), len(counted)
+
+
+def format_key(key: Any) -> str:
+    """Format a value as a distribution key, integer codes as floats like "1.0"."""
+    if isinstance(key, np.generic):
+        key = key.item()
+    return str(float(key)) if isinstance(key, int) else str(key)
+
+
+def format_keys(distribution: Dict[Any, Any]) -> Dict[str, Any]:
+    """Format the keys of a distribution with format_key."""
+    return {format_key(k): v for k, v in distribution.items()}
+
+
+def column_distribution(series: pd.Series, normalize: bool = True, exclude: Any = None) -> Dict[str, Any]:
+    """
+    Distribution of the non-missing values of a column.
+
+    Args:
+        series: Column, already filtered
+        normalize: Whether to return shares instead of counts
+        exclude: Value to leave out (optional)
+
+    Returns:
+        Dict mapping formatted values to counts or shares, most frequent first
+    """
+    if exclude is not None:
+        series = series[series != exclude]
+    return format_keys(value_counts(series.dropna(), normalize=normalize).to_dict())
+
+
+def parse_column_specs(specs: List[Any], normalize: bool = True) -> List[Tuple[Any, bool, Any]]:
+    """
+    Read the column list of a batch distribution request.
+
+    Args:
+        specs: Column names, or objects like {"column": "q1", "normalize": false, "exclude": 0}
+        normalize: Default of the columns that do not set "normalize"
+
+    Returns:
+        List of (column, normalize, exclude) tuples
+    """
+    if not isinstance(specs, list) or not specs:
+        raise ValueError("columns must be a non-empty list")
+    parsed = []
+    for spec in specs:
+        if isinstance(spec, dict):
+            if "column" not in spec:
+                raise ValueError(f"Column entry {spec} has no \"column\"")
+            parsed.append((spec["column"], bool(spec.get("normalize", normalize)), spec.get("exclude")))
+        else:
+            parsed.append((spec, normalize, None))
+    return parsed
+
+
+# Denominators of a crosstab: the rows of each group, all counted rows, or raw counts
+CROSSTAB_NORMALIZE = ("group", "overall", "none")
+
+
+def crosstab_counts(data: pd.DataFrame, column: Any, groups: List[Any], exclude: Any = None) -> pd.Series:
+    """
+    Count the values of a column within every combination of the group columns.
+
+    Rows with a missing value in the column or in a group column are not counted.
+
+    Args:
+        data: Frame holding the column and the group columns, already filtered
+        column: Column to count
+        groups: One or two columns to group by
+        exclude: Value of the column to leave out (optional)
+
+    Returns:
+        Counts indexed by (*group values, value)
+    """
+    frame = data[groups + [column]]
+    if exclude is not None:
+        frame = frame[frame[column] != exclude]
+    return frame.groupby(groups + [column], observed=True, sort=False, dropna=True).size()
+
+
+def crosstab_result(counts: Dict[Tuple[Any, ...], int], normalize: str = "group") -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Turn crosstab counts into nested distributions.
+
+    Args:
+        counts: Counts keyed by (*group values, value)
+        normalize: "group" for shares within each group, "overall" for shares of all
+            counted rows, "none" for counts
+
+    Returns:
+        Tuple of the distributions nested by group value, most frequent value first,
+        and the number of counted rows of each group with the same nesting
+    """
+    if normalize not in CROSSTAB_NORMALIZE:
+        raise ValueError(f"normalize must be one of {', '.join(CROSSTAB_NORMALIZE)}")
+    table: Dict[Tuple[Any, ...], Dict[Any, int]] = {}
+    for (*group, value), count in counts.items():
+        if count > 0:
+            table.setdefault(tuple(group), {})[value] = int(count)
+
+    groups = list(table)
+    try:
+        groups.sort()
+    except TypeError:
+        # Group columns mixing text and numbers keep their order of appearance
+        pass
+
+    overall = sum(sum(values.values()) for values in table.values())
+    distributions: Dict[str, Any] = {}
+    sizes: Dict[str, Any] = {}
+    for group in groups:
+        values = sorted(table[group].items(), key=lambda item: item[1], reverse=True)
+        total = sum(count for _, count in values)
+        denominator = {"group": total, "overall": overall, "none": 1}[normalize]
+        node, size_node = distributions, sizes
+        for key in group[:-1]:
+            node = node.setdefault(format_key(key), {})
+            size_node = size_node.setdefault(format_key(key), {})
+        node[format_key(group[-1])] = {format_key(k): v / denominator if normalize != "none" else v for k, v in values}
+        size_node[format_key(group[-1])] = total
+    return distributions, sizes
+
+
+def align_distributions(results: Dict[str, Dict[Any, Any]]) -> Dict[str, Dict[Any, Any]]:
+    """
+    Give every file the same values for each column, so distributions can be compared side by side.
+
+    Args:
+        results: Distributions by column, keyed by file. Columns holding an "error" are kept as they are
+
+    Returns:
+        The distributions with the values missing from a file added as 0, in order of first appearance
+    """
+    def valid(distribution: Any) -> bool:
+        return isinstance(distribution, dict) and "error" not in distribution
+
+    values: Dict[Any, Dict[str, None]] = {}
+    for distributions in results.values():
+        for column, distribution in distributions.items():
+            if valid(distribution):
+                values.setdefault(column, {}).update(dict.fromkeys(distribution))
+    return {
+        file: {
+            column: {k: distribution.get(k, 0) for k in values[column]} if valid(distribution) else distribution
+            for column, distribution in distributions.items()
+        }
+        for file, distributions in results.items()
+    }
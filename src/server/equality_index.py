@@ -0,0 +1,101 @@
+import hashlib
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils import load_file_artifact
+
+
+class EqualityIndex:
+    """
+    Inverted index mapping each value of a column to the rows holding it.
+
+    Row positions are stored grouped by value in one array, so the rows of a
+    value are a slice of that array and lookups never copy or scan the column.
+    """
+
+    def __init__(self, series: pd.Series):
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        codes = np.asarray(codes)
+        valid = np.flatnonzero(codes >= 0)
+        # Stable sort keeps the rows of each value in ascending order
+        order = np.argsort(codes[valid], kind="stable")
+        self.rows_by_value = valid[order].astype(np.int32 if len(series) < 2 ** 31 else np.int64)
+        counts = np.bincount(codes[valid], minlength=len(uniques))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        # Dict lookup follows == semantics across numeric types (10 matches 10.0)
+        self.codes = {value: code for code, value in enumerate(list(uniques))}
+        self.length = len(series)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.rows_by_value.nbytes + self.offsets.nbytes + 100 * len(self.codes))
+
+    def rows(self, value: Any) -> np.ndarray:
+        """
+        Get the positions of the rows where the column equals a value.
+
+        Args:
+            value: Value to look up
+
+        Returns:
+            Sorted array of row positions, empty if the value does not occur
+        """
+        try:
+            code = self.codes.get(value)
+        except TypeError:
+            code = None
+        if code is None:
+            return self.rows_by_value[:0]
+        return self.rows_by_value[self.offsets[code]:self.offsets[code + 1]]
+
+    def mask(self, value: Any) -> np.ndarray:
+        """Get a boolean mask of the rows where the column equals a value."""
+        mask = np.zeros(self.length, dtype=bool)
+        mask[self.rows(value)] = True
+        return mask
+
+
+def get_equality_index(file_path: str, column: Any, data: Optional[pd.DataFrame] = None) -> Optional[EqualityIndex]:
+    """
+    Get the equality index of a column, building it on first use.
+
+    Indexes are persisted next to the file's sidecar like its other artifacts.
+
+    Args:
+        file_path: File name relative to the 'data/' directory
+        column: Name of the column
+        data: Frame read by the caller, the index is built from it if it holds the column (optional)
+
+    Returns:
+        The index, or None if the column does not exist
+    """
+    name = "equality-" + hashlib.sha1(repr(column).encode("utf-8")).hexdigest()[:12]
+
+    def build(df: pd.DataFrame) -> Optional[EqualityIndex]:
+        return EqualityIndex(df[column]) if column in df.columns else None
+
+    return load_file_artifact(file_path, name, build, columns=[column], data=data)
+
+
+def filter_rows(file_path: str, column: Any, value: Any, data: Optional[pd.DataFrame] = None) -> np.ndarray:
+    """
+    Get the positions of the rows of a file where a column equals a value.
+
+    Args:
+        file_path: File name relative to the 'data/' directory
+        column: Column to filter by
+        value: Value to filter for
+        data: Frame read by the caller, with every row of the file (optional)
+
+    Returns:
+        Sorted array of row positions into the frames returned by read_excel
+
+    Raises:
+        ValueError: If the column does not exist
+    """
+    index = get_equality_index(file_path, column, data)
+    if index is None:
+        raise ValueError(f"Column {column} does not exist in the data.")
+    return index.rows(value)
@@ -1,30 +1,46 @@
+import json
 import pandas as pd
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 from fastmcp import FastMCP
-from utils import read_excel
+from utils import get_file_index, get_file_profile, get_name_index, read_excel
+from cache import dataframe_cache
+from chart_cache import chart_cache
+from compact import memory_reports
+from memo import memoize, result_cache
+from name_index import NAME_KINDS
+from payload import DEFAULT_PAGE_SIZE, DEFAULT_ROUND_DIGITS, bounded, paginate
+from prewarm import is_workbook, prewarmer
+from render_pool import render_pool
+from sampling import approximate_stats
+from streaming import should_stream, stream_columns_stats
 
 def register_tools(mcp: FastMCP):
 
 
     @mcp.tool()
+    @bounded
     def list_available_files() -> Dict[str, Any]:
         """
         Lists all available files in the 'data/' directory.
 
         Returns:
-            Dict[str, Any]: Dictionary containing a list of file names.
+            Dict[str, Any]: Dictionary containing a list of file names and, for each workbook,
+            whether it is already loaded ("warm") or still needs parsing ("cold") and when it was last parsed.
         """
         try:
             data_dir = Path("data")
             if not data_dir.exists() or not data_dir.is_dir():
                 return {"error": "'data/' directory does not exist."}
             files = [f"{f.name}" for f in data_dir.iterdir() if f.is_file()]
-            return {"files": files}
+            status = {f: prewarmer.status(f) for f in files if is_workbook(f)}
+            return {"files": files, "status": status}
         except Exception as e:
             return {"error": str(e)}
 
     @mcp.tool()
+    @bounded
+    @memoize
     def get_excel_columns(file_path: str) -> Dict[str, Any]:
         """
         Returns a list of all column names in the given Excel file.
@@ -36,57 +52,151 @@ def register_tools(mcp: FastMCP):
             List[str]: List of column names.
         """
         try:
-            df = read_excel(file_path)
+            df = read_excel(file_path, header_only=True)
             return {"columns": df.columns.tolist()}
         except Exception as e:
             return {"error": str(e)}
 
     @mcp.tool()
+    @bounded
+    @memoize
     def get_columns_stats(
         file_path: str,
         column_name: str | None = None,
+        approximate: bool = False,
+        stratify_by: str | None = None,
+        streaming: bool | None = None,
+        round_digits: int | None = DEFAULT_ROUND_DIGITS,
     ) -> Dict[str, Any]:
         """
         Get statistics of columns in an Excel file.
 
         Args:
             file_path (str): Path to the Excel file.
+            column_name (str): Name of the column, all columns if omitted.
+            approximate (bool): Estimate the statistics of numeric columns from a fixed random sample of rows,
+                with confidence intervals of the means.
+            stratify_by (str): Column whose values are sampled separately in approximate mode (optional).
+            streaming (bool): Read the file in chunks instead of loading it (default: only for very large files not parsed yet).
+            round_digits (int): Decimal places kept in the statistics (null for full precision).
 
         Returns:
-            Dict[str, Any]: Dictionary containing column statistics.
+            Dict[str, Any]: Dictionary containing the statistics of the numeric columns, and a profile of
+            every column (value type, count, nulls, number of distinct values, most frequent value and
+            quartiles), useful to pick the relevant columns of a file.
         """
         try:
-            df = read_excel(file_path)
-            df = df if column_name is None else df[[column_name]]   
+            if approximate:
+                return approximate_stats(file_path, column_name, stratify_by)
+            if should_stream(file_path, streaming):
+                return {"stats": stream_columns_stats(file_path, column_name)}
+            # Served from the profile computed when the file was parsed
+            profile = get_file_profile(file_path)
+            if column_name is not None and column_name not in profile.columns:
+                return {"error": f"Column {column_name} does not exist in the data."}
+            columns = profile.columns if column_name is None else {column_name: profile.columns[column_name]}
+            numeric = {col: p for col, p in columns.items() if p.mean is not None}
             stats = {
-                "length": len(df),
-                "mean": df.mean().to_dict(),
-                "std": df.std().to_dict(),
-                "min": df.min().to_dict(),
-                "max": df.max().to_dict(),
+                "length": profile.rows,
+                "mean": {col: p.mean for col, p in numeric.items()},
+                "std": {col: p.std for col, p in numeric.items()},
+                "min": {col: p.min for col, p in numeric.items()},
+                "max": {col: p.max for col, p in numeric.items()},
             }
-            return {"stats": stats}
+            return {"stats": stats, "profile": {col: p.to_dict() for col, p in columns.items()}}
         except Exception as e:
             return {"error": str(e)}
 
     @mcp.tool()
-    def get_column_unique_values(file_path: str, column_name: str) -> Dict[str, Any]:
+    @bounded
+    @memoize
+    def get_column_unique_values(
+        file_path: str,
+        column_name: str,
+        limit: int | None = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ) -> Dict[str, Any]:
         """
         Get unique values of a specific column in an Excel file.
 
         Args:
             file_path (str): Path to the Excel file.
             column_name (str): Name of the column to get unique values from.
+            limit (int): Number of values to return (null for every value).
+            cursor (str): next_cursor of a previous result, to get the values that follow it (optional).
 
         Returns:
-            Dict[str, Any]: Dictionary containing unique values of the column.
+            Dict[str, Any]: Dictionary containing unique values of the column, their total number and,
+            if more values follow, the next_cursor.
         """
         try:
-            df = read_excel(file_path)
-            if column_name not in df.columns:
-                return {"error": f"Column '{column_name}' does not exist."}
-            unique_values = df[column_name].unique().tolist()
-            return {"unique_values": unique_values}
+            summary = get_file_index(file_path).get(column_name)
+            if summary is not None:
+                unique_values = summary.unique_values
+            else:
+                df = read_excel(file_path, columns=[column_name])
+                if column_name not in df.columns:
+                    return {"error": f"Column '{column_name}' does not exist."}
+                unique_values = df[column_name].unique().tolist()
+            page, info = paginate(unique_values, limit, cursor)
+            return {"unique_values": page, **info}
         except Exception as e:
             return {"error": str(e)}
 
+    @mcp.tool()
+    @bounded
+    @memoize
+    def resolve_names(
+        file_path: str,
+        terms: str,
+        kind: str = "all",
+        top_k: int = 5,
+    ) -> Dict[str, Any]:
+        """
+        Find the columns and values of a file closest to the user's wording, e.g. "wants to study"
+        or 希望修讀, in one call instead of listing the columns and their values.
+
+        Args:
+            file_path (str): Path to the Excel file.
+            terms (str): A term, or a JSON string list of terms resolved together.
+            kind (str): "column" for column names, "value" for values of text columns, "all" for both.
+            top_k (int): Number of matches returned for each term.
+
+        Returns:
+            Dict[str, Any]: Dictionary mapping each term to its matches, best first, each with the
+            column, the value for value matches and a score from 0 to 1 (1 for an exact match).
+        """
+        try:
+            if kind not in NAME_KINDS:
+                return {"error": f"kind must be one of {', '.join(NAME_KINDS)}"}
+            try:
+                parsed = json.loads(terms)
+            except ValueError:
+                parsed = terms
+            queries = parsed if isinstance(parsed, list) else [terms]
+            index = get_name_index(file_path)
+            return {"matches": {str(q): index.search(str(q), kind, top_k) for q in queries}}
+        except Exception as e:
+            return {"error": str(e)}
+
+    @mcp.tool()
+    @bounded
+    def get_cache_stats() -> Dict[str, Any]:
+        """
+        Get statistics of the in-memory data cache.
+
+        Returns:
+            Dict[str, Any]: Dictionary containing cache size and hit/miss/eviction counters, the
+            memory used by each loaded file before and after compaction, the counters of the
+            memoized tool results and of the stored charts, and the state of the chart rendering browser.
+        """
+        try:
+            return {
+                "cache": dataframe_cache.stats(),
+                "memory": memory_reports(),
+                "results": result_cache.stats(),
+                "render": render_pool.stats(),
+                "charts": chart_cache.stats(),
+            }
+        except Exception as e:
+            return {"error": str(e)}
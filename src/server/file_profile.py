@@ -0,0 +1,106 @@
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from compact import value_counts
+
+# Quantiles reported for numeric columns
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+@dataclass
+class ColumnProfile:
+    """Summary of one column, numeric fields are None for columns that are not numeric."""
+
+    dtype: str
+    count: int
+    nulls: int
+    unique: int
+    top: Any = None
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    quantiles: Optional[Dict[str, float]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+
+@dataclass
+class FileProfile:
+    """Profiles of every column of a file."""
+
+    rows: int
+    columns: Dict[Any, ColumnProfile]
+
+
+def _python(value: Any) -> Any:
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def inferred_type(series: pd.Series) -> str:
+    """
+    Name the kind of values a column holds.
+
+    Returns:
+        One of "boolean", "integer", "floating", "datetime", "string", "mixed" or "empty"
+    """
+    values = series.cat.categories if isinstance(series.dtype, pd.CategoricalDtype) else series
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+    if kind == "empty" or series.count() == 0:
+        return "empty"
+    if kind in ("integer", "floating", "boolean", "string"):
+        return kind
+    if kind in ("datetime", "datetime64", "date"):
+        return "datetime"
+    if kind == "mixed-integer-float":
+        return "floating"
+    return "mixed"
+
+
+def profile_column(series: pd.Series) -> ColumnProfile:
+    """
+    Compute the profile of a column, numeric statistics in float64.
+
+    Args:
+        series: Cleaned column
+
+    Returns:
+        The profile
+    """
+    kind = inferred_type(series)
+    counts = value_counts(series)
+    profile = ColumnProfile(
+        dtype=kind,
+        count=int(series.count()),
+        nulls=int(series.isna().sum()),
+        unique=len(counts),
+        top=_python(counts.index[0]) if len(counts) else None,
+    )
+    if kind in ("integer", "floating", "boolean") and not isinstance(series.dtype, pd.CategoricalDtype):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        if len(values):
+            # Compact frames store downcast integers, the statistics are computed in float64
+            profile.mean = float(values.mean())
+            profile.std = float(values.std(ddof=1)) if len(values) > 1 else None
+            profile.min = float(values.min())
+            profile.max = float(values.max())
+            profile.quantiles = {str(q): float(v) for q, v in zip(QUANTILES, np.quantile(values, QUANTILES))}
+    return profile
+
+
+def build_profile(df: pd.DataFrame) -> FileProfile:
+    """
+    Build the profile of a cleaned DataFrame.
+
+    Args:
+        df: Cleaned DataFrame as returned by read_excel
+
+    Returns:
+        FileProfile covering every column
+    """
+    return FileProfile(rows=len(df), columns={col: profile_column(df[col]) for col in df.columns})
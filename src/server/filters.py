@@ -0,0 +1,211 @@
+import json
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from equality_index import filter_rows
+
+# Operators of a filter condition
+COMPARISONS = ("==", "!=", "<", "<=", ">", ">=")
+OPERATORS = COMPARISONS + ("between", "in", "not_in", "is_null", "not_null")
+
+Mask = Callable[[pd.DataFrame], np.ndarray]
+
+
+class FilterExpression:
+    """
+    A filter expression compiled into a single function returning a boolean row mask.
+
+    Expressions are JSON objects. A condition has a "column", an "op" and,
+    except for is_null and not_null, a "value":
+
+        {"column": "gender", "op": "==", "value": "M"}
+        {"column": "score", "op": "between", "value": [60, 80]}
+        {"column": "school id", "op": "in", "value": [10, 11]}
+
+    Conditions are combined with {"and": [...]}, {"or": [...]} and
+    {"not": {...}}. A list of conditions is shorthand for "and", and an object
+    without these keys, like {"gender": "M", "school id": 10}, is shorthand for
+    equality on every listed column.
+    """
+
+    def __init__(self, tree: Any):
+        self.columns: Tuple[Any, ...] = ()
+        self._mask, self.text = self._compile(tree)
+
+    def mask(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Evaluate the expression on a frame.
+
+        Args:
+            data: Frame holding at least the columns referenced by the expression
+
+        Returns:
+            Boolean array with one entry per row
+        """
+        missing = [col for col in self.columns if col not in data.columns]
+        if missing:
+            raise ValueError(f"Column {missing[0]} does not exist in the data.")
+        return self._mask(data)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def _compile(self, node: Any) -> Tuple[Mask, str]:
+        if isinstance(node, list):
+            node = {"and": node}
+        if not isinstance(node, dict) or not node:
+            raise ValueError(f"Invalid filter expression: {node!r}")
+
+        if "and" in node or "or" in node:
+            op = "and" if "and" in node else "or"
+            if len(node) != 1 or not isinstance(node[op], list) or not node[op]:
+                raise ValueError(f'"{op}" takes a non-empty list of expressions')
+            parts = [self._compile(child) for child in node[op]]
+            reduce = np.logical_and.reduce if op == "and" else np.logical_or.reduce
+            masks = [mask for mask, _ in parts]
+            text = f" {op} ".join(f"({t})" if " and " in t or " or " in t else t for _, t in parts)
+            return (lambda df: reduce([mask(df) for mask in masks])), text
+
+        if "not" in node:
+            if len(node) != 1:
+                raise ValueError('"not" takes a single expression')
+            inner, text = self._compile(node["not"])
+            return (lambda df: ~inner(df)), f"not ({text})"
+
+        if "column" in node:
+            return self._condition(node["column"], node.get("op", "=="), node.get("value"), "value" in node)
+
+        # {"gender": "M", "school id": 10}
+        return self._compile({"and": [{"column": col, "op": "==", "value": val} for col, val in node.items()]})
+
+    def _condition(self, column: Any, op: str, value: Any, has_value: bool) -> Tuple[Mask, str]:
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown filter operator {op!r}, expected one of {', '.join(OPERATORS)}")
+        if op in ("is_null", "not_null"):
+            if has_value:
+                raise ValueError(f"{op} does not take a value")
+        elif not has_value:
+            raise ValueError(f"{op} on column {column} needs a value")
+        if op in ("in", "not_in") and not isinstance(value, list):
+            raise ValueError(f"{op} on column {column} needs a list of values")
+        if op == "between" and (not isinstance(value, list) or len(value) != 2):
+            raise ValueError(f"between on column {column} needs a [low, high] pair")
+
+        if column not in self.columns:
+            self.columns += (column,)
+
+        def condition(df: pd.DataFrame) -> np.ndarray:
+            series = df[column]
+            if op == "is_null":
+                result = series.isna()
+            elif op == "not_null":
+                result = series.notna()
+            elif op == "in":
+                result = series.isin(value)
+            elif op == "not_in":
+                result = ~series.isin(value)
+            elif op == "==":
+                result = series == value
+            elif op == "!=":
+                result = series != value
+            else:
+                result = _compare(series, op, value)
+            return np.asarray(result, dtype=bool)
+
+        if op in ("is_null", "not_null"):
+            text = f"{column} {op.replace('_', ' ')}"
+        elif op == "between":
+            text = f"{value[0]} <= {column} <= {value[1]}"
+        else:
+            text = f"{column} {op.replace('_', ' ')} {value!r}"
+        return condition, text
+
+
+def _compare(series: pd.Series, op: str, value: Any) -> pd.Series:
+    # Categoricals are unordered, range conditions compare their values
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    bounds = value if op == "between" else [value]
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in bounds):
+        # Text in a numeric column never matches a numeric range
+        series = pd.to_numeric(series, errors="coerce")
+    if op == "between":
+        return (series >= value[0]) & (series <= value[1])
+    if op == "<":
+        return series < value
+    if op == "<=":
+        return series <= value
+    if op == ">":
+        return series > value
+    return series >= value
+
+
+@lru_cache(maxsize=256)
+def _compile_filters(filters: str) -> FilterExpression:
+    try:
+        tree = json.loads(filters)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"filters is not valid JSON: {e}") from None
+    return FilterExpression(tree)
+
+
+def compile_filters(filters: Optional[str]) -> Optional[FilterExpression]:
+    """
+    Compile a JSON filter expression, reusing the result for repeated expressions.
+
+    Args:
+        filters: JSON filter expression, see FilterExpression (optional)
+
+    Returns:
+        The compiled expression, or None if no filter was given
+    """
+    if filters is None or not filters.strip():
+        return None
+    return _compile_filters(filters)
+
+
+def filter_columns(expression: Optional[FilterExpression]) -> List[Any]:
+    """Columns that must be read to evaluate an expression."""
+    return [] if expression is None else list(expression.columns)
+
+
+def matching_rows(
+    file_path: str,
+    data: pd.DataFrame,
+    filter_column: Optional[str] = None,
+    filter_value: Any = None,
+    expression: Optional[FilterExpression] = None,
+) -> Optional[np.ndarray]:
+    """
+    Get the rows of a frame that pass both the simple and the expression filter.
+
+    Args:
+        file_path: File name relative to the 'data/' directory
+        data: Frame returned by read_excel, holding the columns of the expression
+        filter_column: Column of the simple equality filter (optional)
+        filter_value: Value of the simple equality filter (optional)
+        expression: Compiled filter expression (optional)
+
+    Returns:
+        Sorted array of row positions, or None if no filter applies
+    """
+    rows = None
+    if filter_column is not None and filter_value is not None:
+        rows = filter_rows(file_path, filter_column, filter_value, data)
+    if expression is not None:
+        passing = np.flatnonzero(expression.mask(data))
+        rows = passing if rows is None else np.intersect1d(rows, passing, assume_unique=True)
+    return rows
+
+
+def describe_filters(filter_column: Optional[str], filter_value: Any, expression: Optional[FilterExpression]) -> str:
+    """Readable description of the filters of a tool call, used in error messages."""
+    parts = []
+    if filter_column is not None and filter_value is not None:
+        parts.append(f"column {filter_column} == {filter_value}")
+    if expression is not None:
+        parts.append(str(expression))
+    return " and ".join(parts) if parts else f"column {filter_column} == {filter_value}"
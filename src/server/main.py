@@ -2,6 +2,8 @@ from fastmcp import FastMCP
 from file_operations_tools import register_tools
 from data_analysis_tools import register_tools as data_reading_register_tools
 from data_visualization import register_tools as data_viz_register_tools
+from prewarm import prewarmer
+from render_pool import render_pool
 
 # Initialize FastMCP server
 mcp = FastMCP("Excel Data Reader 2")
@@ -13,5 +15,11 @@ data_viz_register_tools(mcp)
 
 
 if __name__ == "__main__":
+    # Parse the files in data/ in the background and watch for changes
+    prewarmer.start()
+
+    # Open the chart rendering browser ahead of the first chart
+    render_pool.start_background()
+
     # Run the MCP server
     mcp.run(transport="http", host="127.0.0.1", port=9000)
\ No newline at end of file
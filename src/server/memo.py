@@ -0,0 +1,164 @@
+import copy
+import functools
+import inspect
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from cache import Fingerprint, file_fingerprint
+
+# Memory budget and lifetime of memoized tool results, a TTL of 0 disables memoization
+MEMO_MAX_BYTES = int(float(os.environ.get("EXCEL_MEMO_MAX_MB", "32")) * 1024 * 1024)
+MEMO_TTL_SECONDS = float(os.environ.get("EXCEL_MEMO_TTL_SECONDS", "600"))
+
+# Arguments naming the files a tool reads, relative to the 'data/' directory
+FILE_ARGUMENTS = ("file_path", "file_paths")
+
+
+class ResultCache:
+    """
+    LRU cache of tool results bounded by their pickled size, with a time to live.
+
+    Results are keyed by the tool, the fingerprints of the files it reads and
+    its normalized arguments, so a modified workbook never serves a stale result.
+    """
+
+    def __init__(self, max_bytes: int = MEMO_MAX_BYTES, ttl: float = MEMO_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[2] > self.ttl:
+                self._pop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[0])
+
+    def put(self, key: Hashable, result: Any) -> None:
+        try:
+            nbytes = len(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (copy.deepcopy(result), nbytes, time.monotonic())
+            self._current_bytes += nbytes
+            while self._current_bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _pop(self, key: Hashable) -> None:
+        _, nbytes, _ = self._entries.pop(key)
+        self._current_bytes -= nbytes
+
+
+result_cache = ResultCache()
+
+
+def _normalize(value: Any) -> Hashable:
+    # JSON arguments are compared by content, not by spacing or key order
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            return value
+        if isinstance(parsed, (list, dict)):
+            return "json:" + json.dumps(parsed, sort_keys=True, ensure_ascii=False)
+        return value
+    if isinstance(value, (list, dict)):
+        return "json:" + json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return value
+
+
+def _fingerprints(name: str, value: Any) -> List[Fingerprint]:
+    files = json.loads(value) if name == "file_paths" else [value]
+    return [file_fingerprint(os.path.join("data/", f)) for f in files]
+
+
+def memoize(func: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+    """
+    Memoize a tool on the versions of the files it reads and its arguments.
+
+    Results holding an "error" are not cached. Calls whose files cannot be
+    fingerprinted run uncached, so the tool reports the problem itself.
+
+    Args:
+        func: Tool function taking a file_path or file_paths argument
+
+    Returns:
+        The memoized function, with the signature and docstring of func
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if result_cache.ttl <= 0 or result_cache.max_bytes <= 0:
+            return func(*args, **kwargs)
+        try:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            fingerprints = tuple(
+                fp
+                for name in FILE_ARGUMENTS
+                if name in bound.arguments
+                for fp in _fingerprints(name, bound.arguments[name])
+            )
+            key = (
+                f"{func.__module__}.{func.__qualname__}",
+                fingerprints,
+                tuple((name, _normalize(value)) for name, value in bound.arguments.items()),
+            )
+            hash(key)
+        except Exception:
+            return func(*args, **kwargs)
+
+        result = result_cache.get(key)
+        if result is not None:
+            return result
+        result = func(*args, **kwargs)
+        if not (isinstance(result, dict) and "error" in result):
+            result_cache.put(key, result)
+        return result
+
+    return wrapper
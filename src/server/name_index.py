@@ -0,0 +1,159 @@
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+# Text columns with more distinct values (free text, names) only have their column name indexed
+NAMES_MAX_VALUES = int(os.environ.get("EXCEL_NAMES_MAX_VALUES", "1000"))
+
+# Matches scoring lower are not reported
+NAMES_MIN_SCORE = float(os.environ.get("EXCEL_NAMES_MIN_SCORE", "0.3"))
+
+COLUMN = "column"
+VALUE = "value"
+NAME_KINDS = ("all", COLUMN, VALUE)
+
+_SEPARATORS = re.compile(r"[\s_\-./:]+")
+
+
+def normalize_name(text: Any) -> str:
+    """Fold width, case and separators, so "Gender_2024" and "ｇｅｎｄｅｒ 2024" compare equal."""
+    text = unicodedata.normalize("NFKC", str(text)).casefold()
+    return _SEPARATORS.sub(" ", text).strip()
+
+
+def name_grams(text: str) -> Set[str]:
+    """
+    Character unigrams and bigrams of a normalized name.
+
+    Bigrams carry the word boundaries of Latin text. Characters outside ASCII
+    are unigrams too, so a single CJK character such as 修 matches inside a
+    longer name, while single Latin letters do not make every name match.
+    """
+    padded = f" {text} "
+    grams = {c for c in text if not c.isascii()}
+    grams.update(padded[i:i + 2] for i in range(len(padded) - 1))
+    return grams
+
+
+@dataclass
+class NameIndex:
+    """
+    Inverted n-gram index over the column names and text values of a file.
+
+    Entry i is a column name when values[i] is None, otherwise a value of
+    columns[i]. postings maps each gram to the sorted ids of the entries holding it.
+    """
+
+    columns: List[Any]
+    values: List[Any]
+    texts: List[str]
+    sizes: np.ndarray
+    postings: Dict[str, np.ndarray]
+
+    def search(self, query: str, kind: str = "all", top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Rank the columns and values whose names are closest to a query.
+
+        The score weighs the share of the query's grams found in a name over the
+        share of the name covered, so short queries still find long names. Names
+        containing the query, or contained in it, score at least 0.6.
+
+        Args:
+            query: Loose wording of a column name or value
+            kind: "column", "value" or "all"
+            top_k: Number of matches to return
+
+        Returns:
+            Matches with their "column", the "value" for values and the "score", best first
+        """
+        if kind not in NAME_KINDS:
+            raise ValueError(f"kind must be one of {', '.join(NAME_KINDS)}")
+        text = normalize_name(query)
+        grams = name_grams(text)
+        if not grams or not self.texts:
+            return []
+        hits = [self.postings[g] for g in grams if g in self.postings]
+        if not hits:
+            return []
+        overlap = np.bincount(np.concatenate(hits), minlength=len(self.texts)).astype(np.float64)
+        scores = 0.7 * overlap / len(grams) + 0.3 * overlap / self.sizes
+        if kind != "all":
+            is_value = np.fromiter((v is not None for v in self.values), dtype=bool, count=len(self.values))
+            scores[is_value if kind == COLUMN else ~is_value] = 0
+
+        # Containment and exact matches are only checked for the best candidates
+        candidates = np.argsort(-scores, kind="stable")[: max(top_k, 1) * 10]
+        ranked = []
+        for i in candidates:
+            score = float(scores[i])
+            if score <= 0:
+                break
+            name = self.texts[i]
+            if name == text:
+                score = 1.0
+            elif text in name or name in text:
+                short, long = sorted((len(text), len(name)))
+                score = max(score, 0.6 + 0.39 * short / long)
+            if score >= NAMES_MIN_SCORE:
+                ranked.append((score, int(i)))
+        ranked.sort(key=lambda item: item[0], reverse=True)
+
+        matches = []
+        for score, i in ranked[:top_k]:
+            match: Dict[str, Any] = {"kind": COLUMN if self.values[i] is None else VALUE, "column": self.columns[i]}
+            if self.values[i] is not None:
+                match["value"] = self.values[i]
+            match["score"] = round(score, 3)
+            matches.append(match)
+        return matches
+
+
+def _indexed_values(series: pd.Series) -> List[Any]:
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return []
+    values = series.dropna().unique()
+    if len(values) > NAMES_MAX_VALUES:
+        return []
+    return [v for v in values if isinstance(v, str)]
+
+
+def build_name_index(df: pd.DataFrame) -> NameIndex:
+    """
+    Build the name index of a cleaned DataFrame.
+
+    Args:
+        df: Cleaned DataFrame as returned by read_excel
+
+    Returns:
+        NameIndex over every column name and the values of the text columns with
+        at most NAMES_MAX_VALUES distinct values
+    """
+    columns: List[Any] = []
+    values: List[Optional[Any]] = []
+    for col in df.columns:
+        columns.append(col)
+        values.append(None)
+        for value in _indexed_values(df[col]):
+            columns.append(col)
+            values.append(value)
+
+    texts = [normalize_name(col if value is None else value) for col, value in zip(columns, values)]
+    postings: Dict[str, List[int]] = {}
+    sizes = np.ones(len(texts), dtype=np.float64)
+    for i, text in enumerate(texts):
+        grams = name_grams(text)
+        sizes[i] = max(len(grams), 1)
+        for gram in grams:
+            postings.setdefault(gram, []).append(i)
+    return NameIndex(
+        columns=columns,
+        values=values,
+        texts=texts,
+        sizes=sizes,
+        postings={gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()},
+    )
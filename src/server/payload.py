@@ -0,0 +1,355 @@
+import decimal
+import functools
+import inspect
+import json
+import math
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Values listed by default before the rest is summed up or left to the next page
+DEFAULT_TOP_K = int(os.environ.get("EXCEL_TOP_K", "50"))
+DEFAULT_PAGE_SIZE = int(os.environ.get("EXCEL_PAGE_SIZE", "100"))
+
+# Largest tool result sent to the model, larger results are cut and marked as truncated
+MAX_PAYLOAD_BYTES = int(float(os.environ.get("EXCEL_MAX_PAYLOAD_KB", "64")) * 1024)
+
+# Decimal places kept in the floats of tool results
+DEFAULT_ROUND_DIGITS = int(os.environ.get("EXCEL_ROUND_DIGITS", "4"))
+
+# Key of the bucket summing the values left out of a distribution
+OTHER_KEY = "__other__"
+
+
+def _offset(cursor: Optional[str]) -> int:
+    if cursor is None or cursor == "":
+        return 0
+    try:
+        offset = int(cursor)
+    except ValueError:
+        offset = -1
+    if offset < 0:
+        raise ValueError(f"Invalid cursor {cursor!r}, pass the next_cursor of the previous result")
+    return offset
+
+
+def paginate(items: List[Any], limit: Optional[int], cursor: Optional[str] = None) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Cut a page out of a list.
+
+    Args:
+        items: All items, in a stable order
+        limit: Page size, None for every item after the cursor
+        cursor: Cursor returned with the previous page (optional)
+
+    Returns:
+        Tuple of the page and a dict with the "total" number of items and, if more
+        items follow, the "next_cursor"
+    """
+    if limit is not None and limit < 1:
+        raise ValueError("The page size must be at least 1")
+    offset = _offset(cursor)
+    end = len(items) if limit is None else offset + limit
+    info: Dict[str, Any] = {"total": len(items)}
+    if end < len(items):
+        info["next_cursor"] = str(end)
+    return items[offset:end], info
+
+
+def paginate_distribution(
+    distribution: Dict[str, Any], top_k: Optional[int], cursor: Optional[str] = None
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Keep the top values of a distribution and sum the others into an OTHER_KEY bucket.
+
+    Args:
+        distribution: Values mapped to counts or shares, most frequent first
+        top_k: Number of values to keep, None for all
+        cursor: Cursor returned with the previous page, to list the following values (optional)
+
+    Returns:
+        Tuple of the page of the distribution and a dict with the "total_values" and,
+        if more values follow, the "next_cursor"
+    """
+    items = list(distribution.items())
+    page, info = paginate(items, top_k, cursor)
+    result = dict(page)
+    end = _offset(cursor) + len(page)
+    if end < len(items):
+        # Values of earlier pages were listed already, only the values after the page are summed up
+        result[OTHER_KEY] = sum(v for _, v in items[end:])
+    meta = {"total_values": info["total"]}
+    if "next_cursor" in info:
+        meta["next_cursor"] = info["next_cursor"]
+    return result, meta
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _cut_leaves(value: Any, length: int, other: bool) -> Any:
+    # Keep the first entries of every innermost dict, optionally summing the rest into OTHER_KEY
+    if not isinstance(value, dict):
+        return value
+    if any(isinstance(v, dict) for v in value.values()):
+        return {k: _cut_leaves(v, length, other) for k, v in value.items()}
+    if len(value) <= length:
+        return value
+    items = list(value.items())
+    cut = dict(items[:length])
+    rest = [v for _, v in items[length:]]
+    if other and all(_is_number(v) for v in rest):
+        cut[OTHER_KEY] = cut.get(OTHER_KEY, 0) + sum(rest)
+    return cut
+
+
+def _leaf_length(value: Any) -> int:
+    if not isinstance(value, dict):
+        return 0
+    if any(isinstance(v, dict) for v in value.values()):
+        return max(_leaf_length(v) for v in value.values())
+    return len(value)
+
+
+def top_values(distributions: Any, top_k: Optional[int]) -> Any:
+    """
+    Keep the most frequent values of every distribution of a result, the others summed into OTHER_KEY.
+
+    Args:
+        distributions: A distribution, or distributions nested by column or group, most frequent first
+        top_k: Number of values to keep per distribution, None for all
+
+    Returns:
+        The distributions with the same nesting
+    """
+    if top_k is None:
+        return distributions
+    if top_k < 1:
+        raise ValueError("top_k must be at least 1")
+    return _cut_leaves(distributions, top_k, other=True)
+
+
+def _key(key: Any) -> str:
+    # Same keys as json.dumps, so 1 stays "1" and 1.0 stays "1.0"
+    if isinstance(key, np.generic):
+        key = key.item()
+    if isinstance(key, str):
+        return key
+    if key is None or isinstance(key, (bool, int, float)):
+        return json.dumps(key)
+    return str(key)
+
+
+def structured(value: Any, digits: Optional[int] = None) -> Any:
+    """
+    Turn a tool result into plain JSON types.
+
+    Dict keys become strings, numpy scalars, decimals and arrays become Python
+    numbers and lists, missing floats become None and the other floats are rounded.
+
+    Args:
+        value: Tool result
+        digits: Decimal places kept in floats, None to keep full precision
+
+    Returns:
+        The converted result
+    """
+    if isinstance(value, dict):
+        return {_key(k): structured(v, digits) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [structured(v, digits) for v in value]
+    if isinstance(value, np.ndarray):
+        return structured(value.tolist(), digits)
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, decimal.Decimal):
+        value = float(value)
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return None
+        return round(value, digits) if digits is not None else value
+    return value
+
+
+# Fields of tool results holding distributions, their cut values are summed into OTHER_KEY
+DISTRIBUTION_FIELDS = ("distribution", "distributions")
+
+# Omitted keys listed in the truncation marker, per field
+OMITTED_KEYS_LISTED = 50
+
+
+def _size(value: Any, digits: Optional[int] = None) -> int:
+    # Size once the floats are rounded, as the result is sent
+    if digits is not None:
+        value = structured(value, digits)
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def _prefix(value: Any, length: int) -> Any:
+    if isinstance(value, dict):
+        return dict(list(value.items())[:length])
+    return value[:length]
+
+
+def _longest(fits: Callable[[int], bool], high: int) -> int:
+    # Largest length in [0, high] that fits, fits being monotonic
+    low = 0
+    while low < high:
+        middle = (low + high + 1) // 2
+        if fits(middle):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _shrink(value: Any, budget: int, other: bool = False, digits: Optional[int] = None) -> Tuple[Any, List[Any]]:
+    """
+    Shorten a list, dict or JSON string to fit a budget.
+
+    Dicts are first cut inside, keeping the leading entries of every innermost
+    dict, and lose whole keys only if that is not enough. Lists and JSON strings
+    keep their leading entries.
+
+    Returns:
+        Tuple of the shortened value and the keys of a dict left out entirely
+    """
+    encoded = None
+    if isinstance(value, str):
+        try:
+            encoded, value = value, json.loads(value)
+        except ValueError:
+            return value[: max(budget // 4, 0)], []
+        if not isinstance(value, (list, dict)):
+            return encoded[: max(budget // 4, 0)], []
+    if not isinstance(value, (list, dict)):
+        return value, []
+
+    if encoded is not None:
+        length = _longest(lambda n: _size(json.dumps(_prefix(value, n), ensure_ascii=False, indent=2)) <= budget, len(value))
+        return json.dumps(_prefix(value, length), ensure_ascii=False, indent=2), []
+    if isinstance(value, list):
+        return _prefix(value, _longest(lambda n: _size(_prefix(value, n), digits) <= budget, len(value))), []
+
+    # Every group or column keeps its most frequent values before any of them is dropped
+    leaves = _longest(lambda n: _size(_cut_leaves(value, n, other), digits) <= budget, _leaf_length(value))
+    cut = _cut_leaves(value, max(leaves, 1), other)
+    if leaves >= 1:
+        return cut, []
+    length = _longest(lambda n: _size(_prefix(cut, n), digits) <= budget, len(cut))
+    return _prefix(cut, length), list(cut)[length:]
+
+
+def _next_offset(value: Any, shrunk: Any, offset: int, distribution: bool) -> Optional[int]:
+    # Offset of the first entry cut from a list or a single distribution, None if nothing was cut
+    if isinstance(value, list) and isinstance(shrunk, list):
+        return offset + len(shrunk) if len(shrunk) < len(value) else None
+    if distribution and isinstance(value, dict) and not any(isinstance(v, dict) for v in value.values()):
+        kept = [k for k in shrunk if k != OTHER_KEY]
+        listed = [k for k in value if k != OTHER_KEY]
+        return offset + len(kept) if len(kept) < len(listed) else None
+    return None
+
+
+def cap_payload(
+    result: Any,
+    max_bytes: int = MAX_PAYLOAD_BYTES,
+    digits: Optional[int] = None,
+    offset: Optional[int] = None,
+) -> Any:
+    """
+    Cut a tool result down to max_bytes of JSON.
+
+    The largest fields are shortened first. Distributions keep their most
+    frequent values and sum the others into OTHER_KEY, other dicts, lists and
+    JSON strings keep their leading entries. A "truncated" marker reports the
+    original size and lists the keys left out entirely.
+
+    Args:
+        result: Tool result, converted by structured with full precision
+        max_bytes: Size limit, 0 for no limit
+        digits: Decimal places kept in floats, rounded after OTHER_KEY is summed up
+        offset: Offset of the cursor the tool was called with, None if it has no cursor.
+            When a list or a single distribution is cut, next_cursor points to its first cut entry
+
+    Returns:
+        The result with its floats rounded, cut only if it does not fit
+    """
+    if not isinstance(result, dict):
+        return structured(result, digits)
+    size = _size(result, digits)
+    if max_bytes <= 0 or size <= max_bytes:
+        return structured(result, digits)
+
+    capped = dict(result)
+    marker: Dict[str, Any] = {
+        "original_bytes": size,
+        "max_bytes": max_bytes,
+        "note": (
+            "The result was cut to fit the payload limit: distributions keep their most frequent values and sum "
+            f"the others in {OTHER_KEY}, other fields keep their first entries. Ask for fewer columns or groups, "
+            "add a filter, or follow next_cursor or use top_k or limit where the tool has them, to see the rest"
+        ),
+    }
+    capped["truncated"] = marker
+    cursors: List[int] = []
+    if offset is not None:
+        # Room for the next_cursor of a cut field
+        capped["next_cursor"] = str(offset + size)
+    for key in sorted((k for k in result if k != "next_cursor"), key=lambda k: _size(result[k], digits), reverse=True):
+        excess = _size(capped, digits) - max_bytes
+        if excess <= 0:
+            break
+        budget = max(_size(capped[key], digits) - excess, 0)
+        reserve, listed = 0, None
+        for _ in range(3):
+            # The list of omitted keys in the marker takes from the budget of the field
+            shrunk, omitted = _shrink(capped[key], max(budget - reserve, 0), key in DISTRIBUTION_FIELDS, digits)
+            listed = {"count": len(omitted), "keys": omitted[:OMITTED_KEYS_LISTED]} if omitted else None
+            if listed is None or _size({key: listed}) <= reserve:
+                break
+            reserve = _size({key: listed})
+        if offset is not None:
+            cut_at = _next_offset(capped[key], shrunk, offset, key in DISTRIBUTION_FIELDS)
+            if cut_at is not None:
+                cursors.append(cut_at)
+        capped[key] = shrunk
+        if listed is not None:
+            marker.setdefault("omitted", {})[key] = listed
+    if offset is not None:
+        if cursors:
+            capped["next_cursor"] = str(min(cursors))
+        elif "next_cursor" in result:
+            capped["next_cursor"] = result["next_cursor"]
+        else:
+            del capped["next_cursor"]
+    return structured(capped, digits)
+
+
+def bounded(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Convert the results of a tool with structured and apply cap_payload.
+
+    Floats are rounded to the tool's round_digits argument when it has one. For
+    tools with a cursor argument, a cut list or distribution gets a next_cursor.
+    """
+    signature = inspect.signature(func)
+    rounds = "round_digits" in signature.parameters
+    pages = "cursor" in signature.parameters
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind_partial(*args, **kwargs)
+        bound.apply_defaults()
+        digits = bound.arguments["round_digits"] if rounds else None
+        offset = None
+        if pages:
+            try:
+                offset = _offset(bound.arguments["cursor"])
+            except ValueError:
+                offset = None
+        return cap_payload(structured(func(*args, **kwargs)), digits=digits, offset=offset)
+
+    return wrapper
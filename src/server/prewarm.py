@@ -0,0 +1,214 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Set
+
+from cache import Fingerprint, dataframe_cache, file_fingerprint
+from cleaning import sentinels_for
+from utils import is_parsed, read_excel
+
+DATA_DIR = "data"
+
+# Extensions of the workbooks parsed in the background
+WORKBOOK_EXTENSIONS = (".xlsx", ".xlsm", ".xls")
+
+# Number of parser processes and how often data/ is checked for changes
+PREWARM_WORKERS = int(os.environ.get("EXCEL_PREWARM_WORKERS", str(min(4, os.cpu_count() or 1))))
+WATCH_INTERVAL_SECONDS = float(os.environ.get("EXCEL_WATCH_INTERVAL_SECONDS", "5"))
+
+
+def _parse_workbook(file_name: str) -> None:
+    # Runs in a worker process, parsing writes the columnar sidecar
+    read_excel(file_name)
+
+
+def is_workbook(file_name: str) -> bool:
+    # Office keeps "~$" lock files next to open workbooks
+    return file_name.lower().endswith(WORKBOOK_EXTENSIONS) and not file_name.startswith("~$")
+
+
+class Prewarmer:
+    """
+    Parses the workbooks in 'data/' in the background.
+
+    Workbooks are parsed in a process pool, which writes their sidecars, and the
+    result is then loaded into the in-memory cache of the server process. A
+    polling watcher re-parses files that are added or modified.
+    """
+
+    def __init__(self, workers: int = PREWARM_WORKERS, interval: float = WATCH_INTERVAL_SECONDS):
+        self.workers = workers
+        self.interval = interval
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._seen: Dict[str, Fingerprint] = {}
+        self._parsing: Set[str] = set()
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start parsing the current files and watching the directory."""
+        if self._thread is not None:
+            return
+        self._executor = self._new_executor()
+        self._thread = threading.Thread(target=self._watch, name="excel-prewarm", daemon=True)
+        self._thread.start()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # Spawned workers do not inherit the server's threads and locks
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def scan(self) -> None:
+        """Schedule every new or modified workbook for parsing."""
+        if not os.path.isdir(DATA_DIR):
+            return
+        current = {}
+        for file_name in os.listdir(DATA_DIR):
+            path = os.path.join(DATA_DIR, file_name)
+            if is_workbook(file_name) and os.path.isfile(path):
+                try:
+                    current[file_name] = file_fingerprint(path)
+                except OSError:
+                    continue
+
+        with self._lock:
+            for file_name in set(self._seen) - set(current):
+                # The file was removed
+                del self._seen[file_name]
+                self._errors.pop(file_name, None)
+                dataframe_cache.invalidate(os.path.join(DATA_DIR, file_name))
+            changed = [name for name, fp in current.items() if self._seen.get(name) != fp]
+            self._seen.update(current)
+
+        for file_name in changed:
+            self.submit(file_name)
+
+    def submit(self, file_name: str) -> None:
+        with self._lock:
+            if file_name in self._parsing or self._executor is None:
+                return
+            self._parsing.add(file_name)
+        try:
+            future = self._submit_parse(file_name)
+        except Exception as e:
+            with self._lock:
+                self._parsing.discard(file_name)
+            self._errors[file_name] = str(e)
+            return
+        future.add_done_callback(lambda f, name=file_name: self._on_parsed(name, f))
+
+    def _submit_parse(self, file_name: str) -> Future:
+        try:
+            return self._executor.submit(_parse_workbook, file_name)
+        except BrokenProcessPool:
+            # A crashed worker breaks the whole pool, start a fresh one
+            self._executor = self._new_executor()
+            return self._executor.submit(_parse_workbook, file_name)
+
+    def parse_now(self, file_names: Iterable[str]) -> Dict[str, str]:
+        """
+        Parse the workbooks that are not cached yet concurrently and wait for them.
+
+        The workers write the sidecars, which the calling process then loads
+        cheaply. A single cold workbook is left to the caller, since starting
+        worker processes costs more than parsing it in place.
+
+        Args:
+            file_names: File names relative to the 'data/' directory
+
+        Returns:
+            Dict mapping the files that failed to parse to their error
+        """
+        cold = []
+        for file_name in dict.fromkeys(file_names):
+            try:
+                if not is_parsed(file_name):
+                    cold.append(file_name)
+            except OSError:
+                # Missing files are reported by the caller
+                continue
+        if len(cold) < 2:
+            return {}
+
+        own_executor = self._executor is None
+        executor = (
+            ProcessPoolExecutor(max_workers=min(self.workers, len(cold)), mp_context=multiprocessing.get_context("spawn"))
+            if own_executor else None
+        )
+        errors = {}
+        try:
+            futures = {
+                name: executor.submit(_parse_workbook, name) if own_executor else self._submit_parse(name)
+                for name in cold
+            }
+            for name, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    errors[name] = str(e)
+        finally:
+            if own_executor:
+                executor.shutdown()
+        return errors
+
+    def _on_parsed(self, file_name: str, future: Future) -> None:
+        try:
+            future.result()
+            # Loads the sidecar written by the worker into this process
+            read_excel(file_name)
+            self._errors.pop(file_name, None)
+        except Exception as e:
+            self._errors[file_name] = str(e)
+        finally:
+            with self._lock:
+                self._parsing.discard(file_name)
+
+    def _watch(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.scan()
+            except Exception:
+                pass
+            self._stop.wait(self.interval)
+
+    def status(self, file_name: str) -> Dict[str, Any]:
+        """
+        Report whether a file is ready to be served from memory.
+
+        Args:
+            file_name: File name relative to the 'data/' directory
+
+        Returns:
+            Dict with the "status" (warm, parsing, cold or error) and the "last_parsed" time
+        """
+        path = os.path.join(DATA_DIR, file_name)
+        loaded_at = dataframe_cache.loaded_at(path)
+        result: Dict[str, Any] = {
+            "status": "cold",
+            "last_parsed": datetime.fromtimestamp(loaded_at).isoformat(timespec="seconds") if loaded_at else None,
+        }
+        try:
+            fingerprint = file_fingerprint(path)
+        except OSError:
+            return result
+
+        if dataframe_cache.lookup(fingerprint, [sentinels_for(file_name)], record=False) is not None:
+            result["status"] = "warm"
+        elif file_name in self._parsing:
+            result["status"] = "parsing"
+        elif file_name in self._errors:
+            result["status"] = "error"
+            result["error"] = self._errors[file_name]
+        return result
+
+
+prewarmer = Prewarmer()
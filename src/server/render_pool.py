@@ -0,0 +1,206 @@
+import asyncio
+import atexit
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+try:
+    import kaleido
+except ImportError:  # pragma: no cover - kaleido is optional, plotly reports it when rendering
+    kaleido = None
+
+# Browser tabs rendering at the same time, 0 renders every chart with a new browser
+RENDER_WORKERS = int(os.environ.get("EXCEL_RENDER_WORKERS", "2"))
+RENDER_TIMEOUT_SECONDS = float(os.environ.get("EXCEL_RENDER_TIMEOUT_SECONDS", "60"))
+
+# Size of the exported images, the scale multiplies the resolution of PNG and WebP images
+IMAGE_WIDTH = 1200
+IMAGE_HEIGHT = 800
+IMAGE_SCALE = float(os.environ.get("EXCEL_IMAGE_SCALE", "2"))
+
+
+def _warmup_figure() -> go.Figure:
+    return go.Figure(go.Bar(x=["a", "b"], y=[1, 2]))
+
+
+class RenderPool:
+    """
+    A long-lived headless browser rendering Plotly figures to images.
+
+    fig.to_image starts and stops a browser for every chart. The pool keeps one
+    Kaleido browser open with several tabs, driven from an event loop thread of
+    its own, so renders skip the browser startup and several charts render in
+    parallel. A browser that fails is restarted on the next render.
+    """
+
+    def __init__(self, workers: int = RENDER_WORKERS, timeout: float = RENDER_TIMEOUT_SECONDS):
+        self.workers = workers
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._browser: Any = None
+        self.rendered = 0
+        self.restarts = 0
+        self.startup_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return kaleido is not None and self.workers > 0
+
+    def start(self, warmup: bool = True) -> None:
+        """
+        Open the browser if it is not open yet.
+
+        Args:
+            warmup: Render a small chart in every tab, so the first real chart
+                does not pay for loading plotly.js
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._browser is not None:
+                return
+            started = time.perf_counter()
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="render-pool", daemon=True).start()
+            self._browser = self._call(self._open(), self.timeout)
+            self.startup_seconds = time.perf_counter() - started
+        if warmup:
+            self.render_many([_warmup_figure()] * self.workers, width=100, height=100, scale=1)
+
+    def start_background(self) -> None:
+        """Open and warm up the browser in a background thread, errors are kept in last_error."""
+
+        def run():
+            try:
+                self.start()
+            except Exception as e:
+                self.last_error = str(e)
+
+        threading.Thread(target=run, name="render-pool-start", daemon=True).start()
+
+    def stop(self) -> None:
+        """Close the browser and stop the event loop thread."""
+        with self._lock:
+            if self._browser is not None:
+                try:
+                    self._call(self._browser.close(), self.timeout)
+                except Exception:
+                    pass
+                self._browser = None
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+
+    def render(
+        self,
+        fig: go.Figure,
+        format: str = "png",
+        width: int = IMAGE_WIDTH,
+        height: int = IMAGE_HEIGHT,
+        scale: float = IMAGE_SCALE,
+    ) -> bytes:
+        """
+        Render a figure to image bytes.
+
+        Args:
+            fig: Figure to render
+            format: Image format, as for fig.to_image
+            width: Width in pixels before scaling
+            height: Height in pixels before scaling
+            scale: Resolution multiplier
+
+        Returns:
+            The encoded image
+        """
+        return self.render_many([fig], format, width, height, scale)[0]
+
+    def render_many(
+        self,
+        figs: Sequence[go.Figure],
+        format: str = "png",
+        width: int = IMAGE_WIDTH,
+        height: int = IMAGE_HEIGHT,
+        scale: float = IMAGE_SCALE,
+    ) -> List[bytes]:
+        """
+        Render several figures at once, as many in parallel as the pool has tabs.
+
+        Returns:
+            The encoded images, in the order of figs
+        """
+        if not figs:
+            return []
+        if not self.enabled:
+            return [fig.to_image(format=format, width=width, height=height, scale=scale) for fig in figs]
+
+        opts = {"format": format, "width": width, "height": height, "scale": scale}
+        specs = [fig.to_dict() for fig in figs]
+        # Renders queue for the tabs, so the batch gets a timeout per round of renders
+        timeout = self.timeout * (1 + (len(specs) - 1) // max(self.workers, 1))
+        try:
+            return self._render_once(specs, opts, timeout)
+        except Exception:
+            # The browser may have died, the second attempt opens a new one
+            self.restarts += 1
+            return self._render_once(specs, opts, timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "workers": self.workers,
+            "running": self._browser is not None,
+            "startup_seconds": self.startup_seconds,
+            "rendered": self.rendered,
+            "restarts": self.restarts,
+            "last_error": self.last_error,
+        }
+
+    async def _open(self) -> Any:
+        options: Dict[str, Any] = {"n": self.workers, "timeout": self.timeout}
+        if pio.defaults.plotlyjs:
+            options["plotlyjs"] = pio.defaults.plotlyjs
+        if pio.defaults.mathjax:
+            options["mathjax"] = pio.defaults.mathjax
+        browser = kaleido.Kaleido(**options)
+        await browser.open()
+        return browser
+
+    @staticmethod
+    async def _render_all(browser: Any, specs: List[Dict[str, Any]], opts: Dict[str, Any]) -> List[bytes]:
+        return list(await asyncio.gather(*(browser.calc_fig(spec, opts=opts, topojson=pio.defaults.topojson) for spec in specs)))
+
+    def _render_once(self, specs: List[Dict[str, Any]], opts: Dict[str, Any], timeout: float) -> List[bytes]:
+        self.start(warmup=False)
+        browser = self._browser
+        try:
+            images = self._call(self._render_all(browser, specs, opts), timeout)
+        except Exception as e:
+            self.last_error = str(e)
+            self._discard(browser)
+            raise
+        self.rendered += len(images)
+        return images
+
+    def _call(self, coroutine: Any, timeout: float) -> Any:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+
+    def _discard(self, browser: Any) -> None:
+        with self._lock:
+            if self._browser is not browser:
+                return
+            self._browser = None
+        try:
+            self._call(browser.close(), self.timeout)
+        except Exception:
+            pass
+
+
+render_pool = RenderPool()
+atexit.register(render_pool.stop)
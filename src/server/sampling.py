@@ -0,0 +1,344 @@
+import hashlib
+import os
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from distributions import format_key
+from filters import FilterExpression
+from streaming import iter_chunks, should_stream
+from utils import load_file_artifact
+
+# Rows drawn for approximate answers, the seed makes the sample reproducible
+SAMPLE_ROWS = int(os.environ.get("EXCEL_SAMPLE_ROWS", "10000"))
+SAMPLE_SEED = int(os.environ.get("EXCEL_SAMPLE_SEED", "0"))
+
+# Coverage of the reported confidence intervals
+CONFIDENCE_LEVEL = float(os.environ.get("EXCEL_CONFIDENCE_LEVEL", "0.95"))
+
+
+@dataclass
+class RowSample:
+    """
+    A random sample of the rows of a file, drawn independently within each stratum.
+
+    An unstratified sample is a single stratum. Every sampled row stands for
+    stratum_sizes / stratum_samples rows of the file. The values of the sampled
+    rows are kept in frame, so estimates never read the whole file.
+    """
+
+    rows: np.ndarray
+    strata: np.ndarray
+    stratum_sizes: np.ndarray
+    stratum_samples: np.ndarray
+    population: int
+    stratified_by: Any = None
+    frame: Optional[pd.DataFrame] = None
+
+    @property
+    def nbytes(self) -> int:
+        arrays = self.rows.nbytes + self.strata.nbytes + self.stratum_sizes.nbytes + self.stratum_samples.nbytes
+        frame = 0 if self.frame is None else int(self.frame.memory_usage(deep=True).sum())
+        return int(arrays + frame)
+
+    @property
+    def weights(self) -> np.ndarray:
+        return (self.stratum_sizes / self.stratum_samples)[self.strata]
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "rows": int(len(self.rows)),
+            "population": self.population,
+            "stratified_by": self.stratified_by,
+            "confidence_level": CONFIDENCE_LEVEL,
+        }
+
+
+def _allocation(sizes: np.ndarray, size: int) -> np.ndarray:
+    # Proportional allocation, with two rows per stratum so every stratum has a variance
+    population = int(sizes.sum())
+    return np.minimum(sizes, np.maximum(np.round(sizes * min(1.0, size / max(population, 1))), 2)).astype(np.int64)
+
+
+def _smallest_keys(keys: np.ndarray, strata: np.ndarray, limits: np.ndarray) -> np.ndarray:
+    # Positions of the rows with the smallest keys of each stratum, limits[h] rows for stratum h
+    order = np.lexsort((keys, strata))
+    ordered = strata[order]
+    rank = np.arange(len(order)) - np.searchsorted(ordered, ordered, side="left")
+    return np.sort(order[rank < limits[ordered]])
+
+
+def _row_sample(rows: np.ndarray, strata: np.ndarray, sizes: np.ndarray, allocation: np.ndarray, stratified_by: Any) -> RowSample:
+    return RowSample(
+        rows=rows,
+        strata=strata,
+        stratum_sizes=sizes.astype(np.float64),
+        stratum_samples=np.maximum(allocation, 1).astype(np.float64),
+        population=int(sizes.sum()),
+        stratified_by=stratified_by,
+    )
+
+
+def draw_sample(strata: np.ndarray, size: int = SAMPLE_ROWS, seed: int = SAMPLE_SEED, stratified_by: Any = None) -> RowSample:
+    """
+    Draw a sample with proportional allocation to the strata.
+
+    Every row gets a random key and each stratum keeps the rows with the
+    smallest keys, so stream_sample draws the same rows chunk by chunk.
+
+    Args:
+        strata: Stratum code of every row of the file
+        size: Number of rows to draw, the whole file if it is smaller
+        seed: Seed of the random generator
+        stratified_by: Column the strata come from, for reporting
+
+    Returns:
+        The sample, with sorted row positions
+    """
+    keys = np.random.default_rng(seed).random(len(strata))
+    sizes = np.bincount(strata, minlength=int(strata.max()) + 1 if len(strata) else 0)
+    allocation = _allocation(sizes, size)
+    rows = _smallest_keys(keys, strata, allocation)
+    return _row_sample(rows, strata[rows], sizes, allocation, stratified_by)
+
+
+def _stratum_codes(values: pd.Series, codes: Dict[Any, int]) -> np.ndarray:
+    # Codes in order of first appearance across chunks, missing values form a stratum of their own
+    return np.fromiter(
+        (codes.setdefault(None if pd.isna(v) else v, len(codes)) for v in values), dtype=np.int64, count=len(values)
+    )
+
+
+def stream_sample(file_path: str, size: int = SAMPLE_ROWS, seed: int = SAMPLE_SEED, stratify_by: Optional[str] = None) -> RowSample:
+    """
+    Draw the sample of draw_sample while streaming the file, without loading it.
+
+    Each stratum keeps at most size candidate rows, the rows with the smallest
+    keys so far, so memory stays bounded by the sample rather than the file.
+
+    Returns:
+        The sample, with the values of its rows
+    """
+    rng = np.random.default_rng(seed)
+    codes: Dict[Any, int] = {}
+    limit = max(size, 2)
+    frames: List[pd.DataFrame] = []
+    keys = np.zeros(0)
+    strata = np.zeros(0, dtype=np.int64)
+    rows = np.zeros(0, dtype=np.int64)
+    sizes = np.zeros(0, dtype=np.int64)
+    position = 0
+    for chunk in iter_chunks(file_path):
+        if stratify_by is not None and stratify_by not in chunk.columns:
+            raise ValueError(f"Column {stratify_by} does not exist in the data.")
+        chunk_strata = np.zeros(len(chunk), dtype=np.int64) if stratify_by is None else _stratum_codes(chunk[stratify_by], codes)
+        counts = np.bincount(chunk_strata, minlength=len(sizes))
+        sizes = np.pad(sizes, (0, len(counts) - len(sizes))) + counts
+
+        keys = np.concatenate([keys, rng.random(len(chunk))])
+        strata = np.concatenate([strata, chunk_strata])
+        rows = np.concatenate([rows, np.arange(position, position + len(chunk))])
+        frames.append(chunk)
+        position += len(chunk)
+
+        kept = _smallest_keys(keys, strata, np.full(len(sizes), limit))
+        frame = pd.concat(frames, ignore_index=True).take(kept).reset_index(drop=True)
+        frames, keys, strata, rows = [frame], keys[kept], strata[kept], rows[kept]
+
+    allocation = _allocation(sizes, size)
+    chosen = _smallest_keys(keys, strata, allocation) if len(keys) else np.zeros(0, dtype=np.int64)
+    sample = _row_sample(rows[chosen], strata[chosen], sizes, allocation, stratify_by)
+    sample.frame = pd.concat(frames, ignore_index=True).take(chosen).reset_index(drop=True) if frames else pd.DataFrame()
+    return sample
+
+
+def get_sample(file_path: str, stratify_by: Optional[str] = None) -> RowSample:
+    """
+    Get the persisted sample of a file, drawing it on first use.
+
+    A large file that is not parsed yet is sampled while streaming it.
+
+    Args:
+        file_path: File name relative to the 'data/' directory
+        stratify_by: Column whose values are sampled separately (optional)
+
+    Returns:
+        The sample, the same for every call until the file changes
+    """
+    name = f"sampled-rows-{SAMPLE_ROWS}-{SAMPLE_SEED}"
+    if stratify_by is not None:
+        name += "-" + hashlib.sha1(str(stratify_by).encode("utf-8")).hexdigest()[:12]
+
+    def build(df: pd.DataFrame) -> RowSample:
+        if stratify_by is None:
+            sample = draw_sample(np.zeros(len(df), dtype=np.int64))
+        elif stratify_by not in df.columns:
+            raise ValueError(f"Column {stratify_by} does not exist in the data.")
+        else:
+            # Missing values form a stratum of their own
+            codes, _ = pd.factorize(df[stratify_by], use_na_sentinel=False)
+            sample = draw_sample(np.asarray(codes, dtype=np.int64), stratified_by=stratify_by)
+        sample.frame = df.take(sample.rows).reset_index(drop=True)
+        return sample
+
+    stream = (lambda: stream_sample(file_path, stratify_by=stratify_by)) if should_stream(file_path) else None
+    return load_file_artifact(file_path, name, build, stream=stream)
+
+
+def _z() -> float:
+    return NormalDist().inv_cdf(0.5 + CONFIDENCE_LEVEL / 2)
+
+
+def _stratum_variance(sample: RowSample, sums: np.ndarray, squares: np.ndarray) -> np.ndarray:
+    # Variance of an estimated total from per-stratum sums of u and u**2, u being (rows, ...) values
+    n = sample.stratum_samples.reshape((-1,) + (1,) * (sums.ndim - 1))
+    big_n = sample.stratum_sizes.reshape(n.shape)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s2 = np.where(n > 1, (squares - sums ** 2 / n) / (n - 1), 0.0)
+        total = big_n ** 2 * (1 - n / big_n) * np.maximum(s2, 0) / n
+    return np.nan_to_num(total).sum(axis=0)
+
+
+def _wilson(p: np.ndarray, variance: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Wilson interval on the effective sample size, the sample covering the whole file gives no width
+    z = _z()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n_eff = np.where(variance > 0, p * (1 - p) / variance, np.inf)
+        center = (p + z ** 2 / (2 * n_eff)) / (1 + z ** 2 / n_eff)
+        half = z * np.sqrt(p * (1 - p) / n_eff + z ** 2 / (4 * n_eff ** 2)) / (1 + z ** 2 / n_eff)
+    low = np.where(np.isfinite(n_eff), np.clip(center - half, 0, 1), p)
+    high = np.where(np.isfinite(n_eff), np.clip(center + half, 0, 1), p)
+    return low, high
+
+
+def _sampled_frame(
+    sample: RowSample,
+    columns: List[Any],
+    filter_column: Optional[str],
+    filter_value: Any,
+    expression: Optional[FilterExpression],
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    sampled = sample.frame
+    for col in columns + ([filter_column] if filter_column is not None and filter_value is not None else []):
+        if col not in sampled.columns:
+            raise ValueError(f"Column {col} does not exist in the data.")
+    domain = np.ones(len(sampled), dtype=bool)
+    if filter_column is not None and filter_value is not None:
+        domain &= np.asarray(sampled[filter_column] == filter_value, dtype=bool)
+    if expression is not None:
+        domain &= expression.mask(sampled)
+    return sampled, domain
+
+
+def approximate_distribution(
+    file_path: str,
+    column_name: str,
+    filter_column: Optional[str] = None,
+    filter_value: Any = None,
+    expression: Optional[FilterExpression] = None,
+    normalize: bool = True,
+    exclude: Any = None,
+    stratify_by: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Estimate the distribution of a column from the file's sample.
+
+    Shares are estimated with the ratio estimator and their intervals are Wilson
+    intervals on the effective sample size of the (stratified) design. Counts
+    are estimated totals with normal intervals.
+
+    Returns:
+        Dict with the estimated "distribution", the "confidence_intervals" of every
+        value and a description of the "sample", or an "error"
+    """
+    sample = get_sample(file_path, stratify_by)
+    sampled, domain = _sampled_frame(sample, [column_name], filter_column, filter_value, expression)
+    if not domain.any():
+        return {"error": "No sampled rows found after filtering"}
+
+    values = sampled[column_name]
+    domain &= values.notna().to_numpy()
+    if exclude is not None:
+        domain &= np.asarray(values != exclude, dtype=bool)
+    codes, uniques = pd.factorize(values[domain])
+    strata = sample.strata[domain]
+    weights = sample.stratum_sizes / sample.stratum_samples
+    shape = (len(sample.stratum_sizes), len(uniques))
+
+    # counts[h, c]: sampled rows of stratum h holding value c, in_domain[h]: counted rows of stratum h
+    counts = np.zeros(shape)
+    np.add.at(counts, (strata, codes), 1)
+    in_domain = np.bincount(strata, minlength=shape[0]).astype(np.float64)[:, None]
+    totals = (weights[:, None] * counts).sum(axis=0)
+
+    if normalize:
+        domain_total = float((weights[:, None] * in_domain).sum())
+        p = totals / domain_total if domain_total else np.zeros(len(uniques))
+        # Linearized variance of the ratio: u = in_domain * (y - p)
+        sums = counts - p * in_domain
+        squares = counts * (1 - 2 * p) + p ** 2 * in_domain
+        variance = _stratum_variance(sample, sums, squares) / domain_total ** 2 if domain_total else np.zeros(len(p))
+        estimates = p
+        low, high = _wilson(p, variance)
+    else:
+        variance = _stratum_variance(sample, counts, counts)
+        half = _z() * np.sqrt(variance)
+        estimates, low, high = totals, np.maximum(totals - half, 0), totals + half
+
+    order = np.argsort(-estimates, kind="stable")
+    return {
+        "distribution": {format_key(uniques[i]): float(estimates[i]) for i in order},
+        "confidence_intervals": {format_key(uniques[i]): [float(low[i]), float(high[i])] for i in order},
+        "sample": sample.describe(),
+    }
+
+
+def approximate_stats(file_path: str, column_name: Optional[str] = None, stratify_by: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Estimate the statistics of get_columns_stats from the file's sample.
+
+    Means come with normal confidence intervals from the (stratified) design,
+    min and max are those of the sampled rows.
+
+    Returns:
+        Dict with the estimated "stats", the "confidence_intervals" of the means and a
+        description of the "sample"
+    """
+    sample = get_sample(file_path, stratify_by)
+    sampled = sample.frame
+    if column_name is not None:
+        if column_name not in sampled.columns:
+            raise ValueError(f"Column {column_name} does not exist in the data.")
+        sampled = sampled[[column_name]]
+    weights = sample.weights
+    h = len(sample.stratum_sizes)
+    z = _z()
+
+    stats: Dict[str, Any] = {"length": sample.population, "mean": {}, "std": {}, "min": {}, "max": {}}
+    intervals: Dict[Any, List[float]] = {}
+    for col in sampled.columns:
+        series = sampled[col]
+        if not (pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series)):
+            continue
+        x = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~np.isnan(x)
+        if not valid.any():
+            continue
+        w, xv, strata = weights[valid], x[valid], sample.strata[valid]
+        mean = float((w * xv).sum() / w.sum())
+        u = xv - mean
+        variance = _stratum_variance(
+            sample, np.bincount(strata, weights=u, minlength=h), np.bincount(strata, weights=u ** 2, minlength=h)
+        ) / w.sum() ** 2
+        n = len(xv)
+        spread = float(np.sqrt((w * u ** 2).sum() / w.sum() * n / (n - 1))) if n > 1 else None
+        stats["mean"][col] = mean
+        stats["std"][col] = spread
+        stats["min"][col] = float(xv.min())
+        stats["max"][col] = float(xv.max())
+        half = z * float(np.sqrt(variance))
+        intervals[col] = [mean - half, mean + half]
+    return {"stats": stats, "confidence_intervals": {"mean": intervals}, "sample": sample.describe()}
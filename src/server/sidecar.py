@@ -0,0 +1,204 @@
+import glob
+import hashlib
+import json
+import os
+import pickle
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from cache import Fingerprint
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+    feather = None
+
+# Directory holding the columnar copies of parsed workbooks.
+SIDECAR_DIR = os.environ.get("EXCEL_SIDECAR_DIR", os.path.join(".cache", "sidecars"))
+
+
+def _sidecar_base(fingerprint: Fingerprint) -> str:
+    digest = hashlib.sha1(fingerprint[0].encode("utf-8")).hexdigest()[:16]
+    return os.path.join(SIDECAR_DIR, digest)
+
+
+def _read_meta(base: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(base + ".json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_sidecar_meta(fingerprint: Fingerprint) -> Optional[Dict[str, Any]]:
+    """Return the metadata stored with a workbook's sidecar, if it is up to date."""
+    meta = _read_meta(_sidecar_base(fingerprint))
+    if meta is None or [meta.get("source"), meta.get("mtime_ns"), meta.get("size")] != list(fingerprint):
+        return None
+    return meta
+
+
+def remove_sidecar(fingerprint: Fingerprint) -> None:
+    """Delete every sidecar file stored for the given source file, artifacts included."""
+    for path in glob.glob(glob.escape(_sidecar_base(fingerprint)) + ".*"):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def load_sidecar(
+    fingerprint: Fingerprint,
+    options: Optional[Dict[str, Any]] = None,
+    columns: Optional[List[Any]] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    Load the cleaned DataFrame persisted for a workbook.
+
+    Args:
+        fingerprint: Fingerprint of the source workbook
+        options: Cleaning options the frame must have been produced with
+        columns: Only load these columns (optional)
+
+    Returns:
+        The cached DataFrame, or None if no sidecar matches the fingerprint
+    """
+    base = _sidecar_base(fingerprint)
+    meta = _read_meta(base)
+    if meta is None:
+        return None
+    if [meta.get("source"), meta.get("mtime_ns"), meta.get("size")] != list(fingerprint):
+        # The workbook changed since the sidecar was written
+        remove_sidecar(fingerprint)
+        return None
+    if meta.get("options") != (options or {}):
+        return None
+
+    try:
+        if meta.get("format") == "arrow" and feather is not None:
+            # Arrow files are columnar, so only the requested columns are read
+            df = feather.read_feather(base + ".arrow", columns=columns, memory_map=True)
+            # Arrow restores missing strings as None, the parser produced NaN
+            for col in df.columns[df.dtypes == object]:
+                if df[col].isna().any():
+                    df[col] = df[col].where(df[col].notna(), np.nan)
+            return df
+        if meta.get("format") == "pickle":
+            df = pd.read_pickle(base + ".pkl")
+            return df if columns is None else df[columns]
+    except Exception:
+        remove_sidecar(fingerprint)
+    return None
+
+
+def save_sidecar(
+    fingerprint: Fingerprint,
+    df: pd.DataFrame,
+    options: Optional[Dict[str, Any]] = None,
+    extra: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """
+    Persist a cleaned DataFrame next to the cache of its source workbook.
+
+    Frames are stored as uncompressed Arrow IPC so they can be memory-mapped on
+    load. Frames Arrow cannot represent (mixed-type columns, non-string headers)
+    are pickled instead.
+
+    Args:
+        fingerprint: Fingerprint of the source workbook
+        df: Cleaned DataFrame to persist
+        options: Cleaning options the frame was produced with
+        extra: Additional JSON-serializable metadata to store with the sidecar
+
+    Returns:
+        True if the sidecar was written
+    """
+    base = _sidecar_base(fingerprint)
+    try:
+        os.makedirs(SIDECAR_DIR, exist_ok=True)
+        remove_sidecar(fingerprint)
+
+        fmt = "pickle"
+        if feather is not None and all(isinstance(c, str) for c in df.columns):
+            try:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                feather.write_feather(table, base + ".arrow.tmp", compression="uncompressed")
+                os.replace(base + ".arrow.tmp", base + ".arrow")
+                fmt = "arrow"
+            except (pa.ArrowException, TypeError, ValueError):
+                pass
+        if fmt == "pickle":
+            df.to_pickle(base + ".pkl.tmp")
+            os.replace(base + ".pkl.tmp", base + ".pkl")
+
+        # The metadata file is written last and marks the sidecar as complete
+        meta = {
+            "source": fingerprint[0],
+            "mtime_ns": fingerprint[1],
+            "size": fingerprint[2],
+            "format": fmt,
+            "options": options or {},
+            "extra": extra or {},
+        }
+        with open(base + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(base + ".json.tmp", base + ".json")
+        return True
+    except Exception:
+        return False
+
+
+def load_artifact(fingerprint: Fingerprint, name: str, options: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Load an object derived from a workbook, such as an index, stored next to its sidecar.
+
+    Args:
+        fingerprint: Fingerprint of the source workbook
+        name: Name of the artifact
+        options: Cleaning options the artifact must have been produced with
+
+    Returns:
+        The stored object, or None if it is missing or out of date
+    """
+    try:
+        with open(f"{_sidecar_base(fingerprint)}.{name}.pkl", "rb") as f:
+            stored = pickle.load(f)
+    except Exception:
+        return None
+    if stored.get("fingerprint") != list(fingerprint) or stored.get("options") != (options or {}):
+        return None
+    return stored["data"]
+
+
+def save_artifact(
+    fingerprint: Fingerprint, name: str, data: Any, options: Optional[Dict[str, Any]] = None
+) -> Optional[int]:
+    """
+    Persist an object derived from a workbook next to its sidecar.
+
+    Args:
+        fingerprint: Fingerprint of the source workbook
+        name: Name of the artifact
+        data: Picklable object to store
+        options: Cleaning options the artifact was produced with
+
+    Returns:
+        Size of the stored artifact in bytes, or None if it could not be written
+    """
+    path = f"{_sidecar_base(fingerprint)}.{name}.pkl"
+    try:
+        os.makedirs(SIDECAR_DIR, exist_ok=True)
+        payload = pickle.dumps(
+            {"fingerprint": list(fingerprint), "options": options or {}, "data": data},
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        with open(path + ".tmp", "wb") as f:
+            f.write(payload)
+        os.replace(path + ".tmp", path)
+        return len(payload)
+    except Exception:
+        return None
@@ -0,0 +1,139 @@
+import os
+import threading
+from typing import Any, Dict, List
+
+import pandas as pd
+
+from prewarm import is_workbook
+from utils import read_excel
+
+try:
+    import duckdb
+except ImportError:  # pragma: no cover - duckdb is optional
+    duckdb = None
+
+# Longest running time of a query, and the most rows it may return
+SQL_TIMEOUT_SECONDS = float(os.environ.get("EXCEL_SQL_TIMEOUT_SECONDS", "30"))
+SQL_MAX_ROWS = int(os.environ.get("EXCEL_SQL_MAX_ROWS", "1000"))
+
+# Threads of each query, all cores by default
+SQL_THREADS = int(os.environ.get("EXCEL_SQL_THREADS", str(os.cpu_count() or 1)))
+
+
+def workbook_tables(data_dir: str = "data") -> Dict[str, str]:
+    """
+    Map the table names of the workbooks in the data directory to their files.
+
+    Every workbook can be queried by its file name and, unless two files share
+    it, by its name without extension, e.g. "2024.xlsx" as "2024".
+
+    Returns:
+        Dict mapping lowercase table names to file names
+    """
+    files = sorted(f for f in os.listdir(data_dir) if is_workbook(f) and os.path.isfile(os.path.join(data_dir, f)))
+    tables: Dict[str, str] = {}
+    stems: Dict[str, List[str]] = {}
+    for f in files:
+        tables[f.lower()] = f
+        stems.setdefault(os.path.splitext(f)[0].lower(), []).append(f)
+    for stem, owners in stems.items():
+        if len(owners) == 1:
+            tables.setdefault(stem, owners[0])
+    return tables
+
+
+def _select_statement(query: str) -> str:
+    statements = duckdb.extract_statements(query)
+    if len(statements) != 1:
+        raise ValueError("Pass exactly one SQL statement")
+    if statements[0].type != duckdb.StatementType.SELECT:
+        raise ValueError("Only SELECT queries are allowed")
+    statement = statements[0].query
+    # The closing semicolon is dropped, even when a comment follows it; token positions count UTF-8 bytes
+    tokens = duckdb.tokenize(statement)
+    encoded = statement.encode("utf-8")
+    if tokens and encoded[tokens[-1][0]:tokens[-1][0] + 1] == b";":
+        statement = encoded[:tokens[-1][0]].decode("utf-8")
+    return statement.strip()
+
+
+def _sql_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Make a frame returned by read_excel registrable in DuckDB.
+
+    Compaction turns low-cardinality object columns into categoricals, and
+    DuckDB cannot register categoricals whose categories mix numbers and text;
+    those columns are handed over as the object columns they were parsed as.
+    """
+    mixed = [
+        i
+        for i, dtype in enumerate(df.dtypes)
+        if isinstance(dtype, pd.CategoricalDtype)
+        and dtype.categories.dtype == object
+        and not all(isinstance(category, str) for category in dtype.categories)
+    ]
+    if not mixed:
+        return df
+    return pd.DataFrame(
+        {i: df.iloc[:, i].astype(object) if i in mixed else df.iloc[:, i] for i in range(df.shape[1])},
+        index=df.index,
+    ).set_axis(df.columns, axis=1)
+
+
+def run_query(query: str, max_rows: int = SQL_MAX_ROWS, timeout: float = SQL_TIMEOUT_SECONDS) -> Dict[str, Any]:
+    """
+    Run a read-only SQL query over the workbooks in 'data/'.
+
+    Only the workbooks the query names are loaded, through read_excel, so
+    cached frames and columnar sidecars are queried without parsing the files
+    again. The query runs on a fresh in-memory connection that cannot touch
+    the file system, and is interrupted after the timeout.
+
+    Args:
+        query: A single SELECT statement
+        max_rows: Most rows to return
+        timeout: Seconds after which the query is interrupted
+
+    Returns:
+        Dict with the result "columns", the "rows", the files queried as "tables"
+        and "more_rows" when the result was cut to max_rows, or an "error"
+    """
+    if duckdb is None:
+        return {"error": "SQL queries need the duckdb package, install it with 'pip install duckdb'"}
+    statement = _select_statement(query)
+
+    known = workbook_tables()
+    # Names that are not workbooks are left to DuckDB, e.g. common table expressions
+    referenced = {name: known[name.lower()] for name in duckdb.get_table_names(statement) if name.lower() in known}
+
+    con = duckdb.connect(config={"enable_external_access": False, "threads": max(SQL_THREADS, 1)})
+    try:
+        for name, file_path in referenced.items():
+            con.register(name, _sql_frame(read_excel(file_path)))
+        con.execute("SET lock_configuration = true")
+
+        timer = threading.Timer(timeout, con.interrupt)
+        timer.start()
+        try:
+            # One row past the limit tells whether the result was cut
+            # The statement ends on its own line, so a trailing -- comment cannot swallow the wrapper
+            cursor = con.execute(f"SELECT * FROM (\n{statement}\n) LIMIT {int(max_rows) + 1}")
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+        except duckdb.InterruptException:
+            return {"error": f"The query took longer than {timeout:g} seconds and was stopped"}
+        except duckdb.CatalogException as e:
+            return {"error": f"{e}\nAvailable tables: {', '.join(sorted(set(known.values())))}"}
+        finally:
+            timer.cancel()
+    finally:
+        con.close()
+
+    result: Dict[str, Any] = {
+        "columns": columns,
+        "rows": rows[:max_rows],
+        "tables": {name: file_path for name, file_path in referenced.items()},
+    }
+    if len(rows) > max_rows:
+        result["more_rows"] = True
+    return result
@@ -0,0 +1,376 @@
+import os
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from cleaning import clean_frame, sentinels_for
+from distributions import binary_counts, crosstab_counts, format_keys
+from file_profile import inferred_type
+from filters import FilterExpression, filter_columns
+from utils import is_parsed
+
+# Rows held in memory at once when streaming a workbook
+CHUNK_ROWS = int(os.environ.get("EXCEL_STREAM_CHUNK_ROWS", "10000"))
+
+# Workbooks at least this large are streamed unless a tool asks otherwise or they are parsed already
+STREAMING_THRESHOLD_BYTES = int(float(os.environ.get("EXCEL_STREAMING_THRESHOLD_MB", "50")) * 1024 * 1024)
+
+
+def should_stream(file_path: str, streaming: Optional[bool] = None) -> bool:
+    """
+    Decide whether a tool call should use the streaming path.
+
+    Args:
+        file_path: File name relative to the 'data/' directory
+        streaming: Explicit choice of the caller, None to decide by file size
+
+    Returns:
+        True if the workbook should be streamed
+    """
+    if streaming is not None:
+        return streaming
+    if os.path.getsize(os.path.join("data/", file_path)) < STREAMING_THRESHOLD_BYTES:
+        return False
+    # A workbook in memory or with a sidecar is served faster than it is streamed
+    return not is_parsed(file_path)
+
+
+def _header_names(row: Iterable[Any]) -> List[Any]:
+    # Same naming as pd.read_excel for empty and duplicated headers
+    names, seen = [], Counter()
+    for i, name in enumerate(row):
+        name = f"Unnamed: {i}" if name is None else name
+        if seen[name]:
+            candidate = f"{name}.{seen[name]}"
+            while candidate in seen:
+                seen[name] += 1
+                candidate = f"{name}.{seen[name]}"
+            seen[name] += 1
+            name = candidate
+        seen[name] += 1
+        names.append(name)
+    return names
+
+
+def _convert_cell(value: Any) -> Any:
+    # pd.read_excel turns integral floats into ints
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def read_header(file_path: str) -> List[Any]:
+    """Read the column names of a workbook, named as read_excel names them."""
+    workbook = load_workbook(os.path.join("data/", file_path), read_only=True, data_only=True)
+    try:
+        header = next(workbook.worksheets[0].iter_rows(values_only=True), None)
+        return [] if header is None else _header_names(header)
+    finally:
+        workbook.close()
+
+
+def iter_chunks(
+    file_path: str,
+    columns: Optional[Iterable[Any]] = None,
+    chunk_size: int = CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a workbook as a sequence of cleaned DataFrame chunks.
+
+    Rows are read with openpyxl's read-only reader, so memory stays bounded by
+    the chunk size regardless of the file size.
+
+    Args:
+        file_path: File name relative to the 'data/' directory
+        columns: Only keep these columns, names missing from the file are skipped (optional)
+        chunk_size: Number of rows per chunk
+
+    Yields:
+        Cleaned DataFrame chunks with the same columns as read_excel
+    """
+    sentinels = sentinels_for(file_path)
+    workbook = load_workbook(os.path.join("data/", file_path), read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        names = _header_names(header)
+        wanted = names if columns is None else set(columns)
+        indices = [i for i, name in enumerate(names) if name in wanted]
+        selected = [names[i] for i in indices]
+
+        buffer = []
+        for row in rows:
+            values = [_convert_cell(row[i]) if i < len(row) else None for i in indices]
+            if all(v is None for v in row):
+                continue
+            buffer.append(values)
+            if len(buffer) >= chunk_size:
+                yield clean_frame(pd.DataFrame.from_records(buffer, columns=selected), sentinels)
+                buffer = []
+        if buffer:
+            yield clean_frame(pd.DataFrame.from_records(buffer, columns=selected), sentinels)
+    finally:
+        workbook.close()
+
+
+def _filtered(
+    chunk: pd.DataFrame,
+    filter_column: Optional[str],
+    filter_value: Any,
+    expression: Optional[FilterExpression] = None,
+) -> pd.DataFrame:
+    if filter_column is not None and filter_value is not None:
+        if filter_column not in chunk.columns:
+            raise ValueError(f"Column {filter_column} does not exist in the data.")
+        chunk = chunk[chunk[filter_column] == filter_value]
+    if expression is not None:
+        chunk = chunk[expression.mask(chunk)]
+    return chunk
+
+
+class ValueCounter:
+    """Incremental value_counts over a column read in chunks."""
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.total = 0
+
+    def update(self, series: pd.Series) -> None:
+        series = series.dropna()
+        self.counts.update(series.value_counts().to_dict())
+        self.total += len(series)
+
+    def result(self, normalize: bool) -> Dict[str, Any]:
+        # Keys are formatted like the in-memory get_column_distribution
+        ordered = list(format_keys(dict(self.counts.most_common())).items())
+        if normalize:
+            return {k: v / self.total for k, v in ordered} if self.total else {}
+        return dict(ordered)
+
+
+class MomentsAccumulator:
+    """Incremental count, mean, std, min and max of a numeric column."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def update(self, series: pd.Series) -> None:
+        values = pd.to_numeric(series, errors="coerce").dropna().to_numpy(dtype=np.float64)
+        if len(values) == 0:
+            return
+        # Chan et al. parallel merge of the chunk moments
+        n, mean = len(values), float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        delta = mean - self.mean
+        total = self.count + n
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        chunk_min, chunk_max = float(values.min()), float(values.max())
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+
+    @property
+    def std(self) -> Optional[float]:
+        return (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else None
+
+
+def stream_column_distribution(
+    file_path: str,
+    column_name: str,
+    filter_column: Optional[str] = None,
+    filter_value: Any = None,
+    normalize: bool = True,
+    exclude: Any = None,
+    expression: Optional[FilterExpression] = None,
+) -> Dict[str, Any]:
+    """
+    Streaming counterpart of get_column_distribution.
+
+    Returns:
+        Dict with the "distribution" and the number of "rows" left after filtering
+    """
+    counter = ValueCounter()
+    rows = 0
+    for chunk in iter_chunks(file_path, [column_name, filter_column] + filter_columns(expression)):
+        if column_name not in chunk.columns:
+            raise ValueError(f"Column {column_name} does not exist in the data.")
+        chunk = _filtered(chunk, filter_column, filter_value, expression)
+        rows += len(chunk)
+        if exclude is not None:
+            chunk = chunk[chunk[column_name] != exclude]
+        counter.update(chunk[column_name])
+    return {"distribution": counter.result(normalize), "rows": rows}
+
+
+def stream_batch_distribution(
+    file_path: str,
+    specs: List[Tuple[Any, bool, Any]],
+    filter_column: Optional[str] = None,
+    filter_value: Any = None,
+    expression: Optional[FilterExpression] = None,
+) -> Dict[str, Any]:
+    """
+    Streaming counterpart of get_batch_distribution, every column is counted in the same pass.
+
+    Returns:
+        Dict with the "distributions" by column and the number of "rows" left after filtering
+    """
+    counters = [ValueCounter() for _ in specs]
+    columns = [column for column, _, _ in specs]
+    present: Set[Any] = set()
+    rows = 0
+    wanted = columns + ([filter_column] if filter_column else []) + filter_columns(expression)
+    for chunk in iter_chunks(file_path, wanted):
+        present = set(chunk.columns)
+        chunk = _filtered(chunk, filter_column, filter_value, expression)
+        rows += len(chunk)
+        for (column, _, exclude), counter in zip(specs, counters):
+            if column in present:
+                target = chunk[column]
+                counter.update(target if exclude is None else target[target != exclude])
+
+    distributions = {}
+    for (column, normalize, _), counter in zip(specs, counters):
+        if column in present:
+            distributions[column] = counter.result(normalize)
+        else:
+            distributions[column] = {"error": f"Column {column} does not exist in the data."}
+    return {"distributions": distributions, "rows": rows}
+
+
+def stream_crosstab_distribution(
+    file_path: str,
+    column_name: str,
+    groups: List[str],
+    exclude: Any = None,
+    filter_column: Optional[str] = None,
+    filter_value: Any = None,
+    expression: Optional[FilterExpression] = None,
+) -> Dict[str, Any]:
+    """
+    Streaming counterpart of get_crosstab_distribution.
+
+    Returns:
+        Dict with the "counts" keyed by (*group values, value) and the number of "rows" left after filtering
+    """
+    counts: Counter = Counter()
+    rows = 0
+    wanted = [column_name] + groups + ([filter_column] if filter_column else []) + filter_columns(expression)
+    for chunk in iter_chunks(file_path, wanted):
+        for col in [column_name] + groups:
+            if col not in chunk.columns:
+                raise ValueError(f"Column {col} does not exist in the data.")
+        chunk = _filtered(chunk, filter_column, filter_value, expression)
+        rows += len(chunk)
+        counts.update(crosstab_counts(chunk, column_name, groups, exclude).to_dict())
+    return {"counts": dict(counts), "rows": rows}
+
+
+def stream_binary_distribution(
+    file_path: str,
+    columns: List[str],
+    value: Any = 1,
+    unique: bool = False,
+    filter_column: Optional[str] = None,
+    filter_value: Any = None,
+    expression: Optional[FilterExpression] = None,
+) -> Dict[str, Any]:
+    """
+    Streaming counterpart of get_binary_distribution.
+
+    Returns:
+        Dict with the per-column share of "result" and the number of "rows" counted
+    """
+    counts = {col: 0 for col in columns}
+    present: List[str] = []
+    rows = 0
+    wanted = columns + ([filter_column] if filter_column else []) + filter_columns(expression)
+    for chunk in iter_chunks(file_path, wanted):
+        present = [col for col in columns if col in chunk.columns]
+        chunk = _filtered(chunk, filter_column, filter_value, expression).dropna(subset=present)
+        chunk_counts, chunk_rows = binary_counts(chunk, present, value, unique)
+        rows += chunk_rows
+        for col, count in zip(present, chunk_counts):
+            counts[col] += int(count)
+
+    result = {col: (counts[col] / rows if rows and col in present else 0.0) for col in columns}
+    if unique and sum(result.values()) > 0:
+        total = sum(result.values())
+        result = {k: v / total for k, v in result.items()}
+    return {"result": result, "rows": rows}
+
+
+def stream_combined_distribution(
+    file_path: str,
+    columns: List[str],
+    filter_column: Optional[str] = None,
+    filter_value: Any = None,
+    expression: Optional[FilterExpression] = None,
+) -> Dict[str, Any]:
+    """
+    Streaming counterpart of get_combined_distribution.
+
+    Returns:
+        Dict with the combined "result" and the number of "rows" left after filtering
+    """
+    counts: Counter = Counter()
+    rows = 0
+    wanted = columns + ([filter_column] if filter_column else []) + filter_columns(expression)
+    for chunk in iter_chunks(file_path, wanted):
+        chunk = _filtered(chunk, filter_column, filter_value, expression)
+        rows += len(chunk)
+        for col in columns:
+            if col in chunk.columns:
+                counts.update(chunk[col].value_counts().to_dict())
+
+    result = {k: v / rows for k, v in counts.most_common()} if rows else {}
+    return {"result": result, "rows": rows}
+
+
+def _numeric_kinds(kinds: Set[str]) -> bool:
+    # Same columns as the numeric statistics of the file profile: numbers, or only booleans
+    kinds = kinds - {"empty"}
+    return bool(kinds) and (kinds <= {"integer", "floating"} or kinds == {"boolean"})
+
+
+def stream_columns_stats(file_path: str, column_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Streaming counterpart of get_columns_stats, restricted to numeric columns.
+
+    Columns mixing numbers with other values are left out, as in memory.
+
+    Returns:
+        Dict with the same statistics as get_columns_stats
+
+    Raises:
+        ValueError: If column_name is not a column of the file
+    """
+    if column_name is not None and column_name not in read_header(file_path):
+        raise ValueError(f"Column {column_name} does not exist in the data.")
+    accumulators: Dict[Any, MomentsAccumulator] = {}
+    kinds: Dict[Any, Set[str]] = {}
+    length = 0
+    for chunk in iter_chunks(file_path, None if column_name is None else [column_name]):
+        length += len(chunk)
+        for col in chunk.columns:
+            kinds.setdefault(col, set()).add(inferred_type(chunk[col]))
+            accumulators.setdefault(col, MomentsAccumulator()).update(chunk[col])
+
+    numeric = {col: acc for col, acc in accumulators.items() if acc.count and _numeric_kinds(kinds[col])}
+    return {
+        "length": length,
+        "mean": {col: acc.mean for col, acc in numeric.items()},
+        "std": {col: acc.std for col, acc in numeric.items()},
+        "min": {col: acc.min for col, acc in numeric.items()},
+        "max": {col: acc.max for col, acc in numeric.items()},
+    }
@@ -1,16 +1,193 @@
 import pandas as pd
-import numpy as np
 import os
+import pickle
+from typing import Any, Callable, Iterable, Optional
+from cache import Fingerprint, dataframe_cache, file_fingerprint
+from cleaning import clean_frame, normalize_sentinels, sentinels_for
+from column_index import FileIndex, build_index
+from file_profile import FileProfile, build_profile
+from name_index import NameIndex, build_name_index
+from compact import COMPACT_ENABLED, compact_frame, record_memory_report
+from sidecar import load_artifact, load_sidecar, read_sidecar_meta, save_artifact, save_sidecar
 
-def read_excel(file_path: str) -> pd.DataFrame:
+# Cache variant holding the header row of a workbook
+HEADER_VARIANT = "header"
+
+def cleaning_options(sentinels: tuple) -> dict:
+    """Options a cached or persisted frame must have been produced with."""
+    return {"sentinels": list(sentinels), "compact": COMPACT_ENABLED}
+
+def is_parsed(file_path: str) -> bool:
+    """Whether read_excel can serve a file from memory or from an up-to-date sidecar."""
+    sentinels = sentinels_for(file_path)
+    fingerprint = file_fingerprint(os.path.join("data/", file_path))
+    if dataframe_cache.lookup(fingerprint, [sentinels], record=False) is not None:
+        return True
+    meta = read_sidecar_meta(fingerprint)
+    return meta is not None and meta.get("options") == cleaning_options(sentinels)
+
+def _read_header(data_path: str, fingerprint: Fingerprint, sentinels: tuple) -> pd.DataFrame:
+    found = dataframe_cache.lookup(fingerprint, [sentinels, HEADER_VARIANT], record=False)
+    if found is not None:
+        return found[1].iloc[:0]
+    # Only the first row is parsed
+    header = pd.read_excel(data_path, nrows=0)
+    dataframe_cache.put(fingerprint, header, HEADER_VARIANT)
+    return header
+
+def read_excel(
+    file_path: str,
+    columns: Optional[Iterable[Any]] = None,
+    header_only: bool = False,
+    sentinels: Optional[Iterable[Any]] = None,
+) -> pd.DataFrame:
+    """
+    Read and clean an Excel file from the 'data/' directory.
+
+    Cleaned frames are stored with compact dtypes (categoricals for
+    low-cardinality text, downcast numeric codes) and cached by file
+    fingerprint, in memory and as a columnar sidecar on disk, so repeated calls
+    and server restarts skip parsing an unchanged file. The returned frame is
+    shared and must not be modified in place.
+
+    Args:
+        file_path: File name relative to the 'data/' directory
+        columns: Only read these columns, names missing from the file are skipped (optional)
+        header_only: Only read the header row, the returned frame has no rows
+        sentinels: Values to treat as missing, defaults to the file's configured sentinels
+    """
     try:
         data_path = os.path.join("data/", file_path)
-        df = pd.read_excel(data_path)
+        sentinels = sentinels_for(file_path) if sentinels is None else normalize_sentinels(sentinels)
+        options = cleaning_options(sentinels)
+        fingerprint = file_fingerprint(data_path)
 
-        df = df.map(lambda x: x.strip() if isinstance(x, str) else x)
-        df = df.map(lambda x: np.nan if isinstance(x, str) and x.strip() == "" else x)
-        df = df.replace([999, "999"], np.nan)
-        
-        return df
+        if header_only:
+            found = dataframe_cache.lookup(fingerprint, [sentinels, HEADER_VARIANT])
+            if found is not None:
+                return found[1].iloc[:0]
+            return _read_header(data_path, fingerprint, sentinels)
+
+        projection = None
+        variant = sentinels
+        if columns is not None:
+            header = _read_header(data_path, fingerprint, sentinels)
+            projection = [c for c in dict.fromkeys(columns) if c in header.columns]
+            if not projection:
+                return header
+            variant = (sentinels, tuple(projection))
+
+        # A cached full frame can serve any projection
+        found = dataframe_cache.lookup(fingerprint, [sentinels] if projection is None else [sentinels, variant])
+        if found is not None:
+            df = found[1]
+            return df if projection is None else df[projection]
+
+        df = load_sidecar(fingerprint, options, projection)
+        if df is not None:
+            meta = read_sidecar_meta(fingerprint) if projection is None else None
+            if meta is not None and "memory" in meta.get("extra", {}):
+                record_memory_report(file_path, meta["extra"]["memory"])
+            dataframe_cache.put(fingerprint, df, variant)
+            return df
+
+        # openpyxl parses every column whatever usecols says, so a projection
+        # gets a full parse, persisted once and sliced by every later call
+        df = _parse(file_path, data_path, fingerprint, sentinels, options)
+        return df if projection is None else df[projection]
     except Exception as e:
-        raise ValueError(f"Error reading Excel file: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Error reading Excel file: {str(e)}")
+
+def _parse(file_path: str, data_path: str, fingerprint: Fingerprint, sentinels: tuple, options: dict) -> pd.DataFrame:
+    df, report = compact_frame(clean_frame(pd.read_excel(data_path), sentinels))
+    record_memory_report(file_path, report)
+    save_sidecar(fingerprint, df, options, extra={"memory": report})
+    # The column index, profile and name index are built once per parse and persisted with the sidecar
+    _store_artifact(fingerprint, "index", build_index(df), sentinels, options)
+    _store_artifact(fingerprint, "profile", build_profile(df), sentinels, options)
+    _store_artifact(fingerprint, "names", build_name_index(df), sentinels, options)
+    dataframe_cache.put(fingerprint, df, sentinels)
+    return df
+
+def _cache_artifact(fingerprint: Fingerprint, name: Any, data: Any, sentinels: tuple, nbytes: Optional[int] = None) -> None:
+    if nbytes is None:
+        nbytes = getattr(data, "nbytes", None)
+    if nbytes is None:
+        nbytes = len(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+    dataframe_cache.put(fingerprint, data, (name, sentinels), nbytes=nbytes)
+
+def _store_artifact(fingerprint: Fingerprint, name: str, data: Any, sentinels: tuple, options: dict) -> None:
+    _cache_artifact(fingerprint, name, data, sentinels, save_artifact(fingerprint, name, data, options))
+
+def load_file_artifact(
+    file_path: str,
+    name: Any,
+    build: Callable[[pd.DataFrame], Any],
+    columns: Optional[Iterable[Any]] = None,
+    persist: bool = True,
+    data: Optional[pd.DataFrame] = None,
+    stream: Optional[Callable[[], Any]] = None,
+) -> Any:
+    """
+    Get an object derived from a file's cleaned data, building it at most once per file version.
+
+    Artifacts are looked up in memory, then next to the file's sidecar, and only
+    built from the DataFrame when neither is up to date.
+
+    Args:
+        file_path: File name relative to the 'data/' directory
+        name: Name of the artifact, a string if the artifact is persisted
+        build: Function computing the artifact from the cleaned DataFrame
+        columns: Columns the artifact is built from, all columns if omitted
+        persist: Whether to store the artifact next to the sidecar
+        data: Frame already read by the caller, built from instead of reading the file
+            if it holds the columns (optional)
+        stream: Function computing the artifact straight from the file, used instead of
+            parsing a file that is not parsed yet (optional)
+
+    Returns:
+        The artifact
+    """
+    data_path = os.path.join("data/", file_path)
+    sentinels = sentinels_for(file_path)
+    options = cleaning_options(sentinels)
+    fingerprint = file_fingerprint(data_path)
+
+    found = dataframe_cache.lookup(fingerprint, [(name, sentinels)], record=False)
+    if found is not None:
+        return found[1]
+
+    stored = load_artifact(fingerprint, name, options) if persist else None
+    if stored is not None:
+        _cache_artifact(fingerprint, name, stored, sentinels)
+        return stored
+
+    if stream is not None and not is_parsed(file_path):
+        artifact = stream()
+    else:
+        if data is not None and columns is not None and all(c in data.columns for c in columns):
+            df = data
+        else:
+            df = read_excel(file_path, columns=columns)
+            # Parsing the file may have built the artifact already
+            found = dataframe_cache.lookup(fingerprint, [(name, sentinels)], record=False)
+            if found is not None:
+                return found[1]
+        artifact = build(df)
+    if persist:
+        _store_artifact(fingerprint, name, artifact, sentinels, options)
+    else:
+        _cache_artifact(fingerprint, name, artifact, sentinels)
+    return artifact
+
+def get_file_index(file_path: str) -> FileIndex:
+    """Get the per-column value counts, null counts and unique values of a file."""
+    return load_file_artifact(file_path, "index", build_index)
+
+def get_file_profile(file_path: str) -> FileProfile:
+    """Get the per-column counts, statistics, quantiles, cardinality and value type of a file."""
+    return load_file_artifact(file_path, "profile", build_profile)
+
+def get_name_index(file_path: str) -> NameIndex:
+    """Get the n-gram index over the column names and text values of a file."""
+    return load_file_artifact(file_path, "names", build_name_index)
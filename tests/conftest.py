@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "server"))
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Empty 'data/' directory, with the working directory (and so the sidecar cache) in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "data"
+    path.mkdir()
+    return path
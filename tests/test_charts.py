@@ -0,0 +1,11 @@
+import pytest
+
+from charts import ChartSpec
+
+
+def test_chart_values_must_be_numbers():
+    assert ChartSpec.from_dict({"type": "bar", "data": {"a": 1, "b": 0.5, "c": None}}).data["b"] == 0.5
+    with pytest.raises(ValueError, match="Value of b "):
+        ChartSpec.from_dict({"type": "bar", "data": {"a": 1, "b": "x"}})
+    with pytest.raises(ValueError, match="Value of 2025/b "):
+        ChartSpec.from_dict({"type": "grouped", "data": {"2024": {"a": 1}, "2025": {"b": True}}})
@@ -0,0 +1,58 @@
+import json
+
+from payload import MAX_PAYLOAD_BYTES, OTHER_KEY, bounded, cap_payload, paginate_distribution
+
+
+def _shares(count):
+    weights = [1 / (i + 1) for i in range(count)]
+    total = sum(weights)
+    return {f"value-{i:05d}": w / total for i, w in enumerate(weights)}
+
+
+def test_other_is_rounded_once():
+    distribution = _shares(3000)
+    capped = cap_payload({"distribution": distribution}, max_bytes=2000, digits=4)
+
+    kept = [k for k in capped["distribution"] if k != OTHER_KEY]
+    rest = list(distribution.values())[len(kept):]
+    assert capped["distribution"][OTHER_KEY] == round(sum(rest), 4)
+    assert all(v == round(v, 4) for v in capped["distribution"].values())
+
+
+def test_next_cursor_follows_the_cut():
+    distribution = _shares(20000)
+
+    @bounded
+    def tool(cursor=None, round_digits=4):
+        page, meta = paginate_distribution(distribution, None, cursor)
+        return {"distribution": page, **meta}
+
+    first = tool()
+    assert "truncated" in first
+    kept = [k for k in first["distribution"] if k != OTHER_KEY]
+    assert first["next_cursor"] == str(len(kept))
+
+    second = tool(cursor=first["next_cursor"])
+    assert next(iter(second["distribution"])) == list(distribution)[len(kept)]
+    assert len(json.dumps(second).encode("utf-8")) <= MAX_PAYLOAD_BYTES
+
+    seen = []
+    page, cursor = first, None
+    while True:
+        seen += [k for k in page["distribution"] if k != OTHER_KEY]
+        if "next_cursor" not in page:
+            break
+        cursor = page["next_cursor"]
+        page = tool(cursor=cursor)
+    assert seen == list(distribution)
+    assert first["distribution"][OTHER_KEY] == round(sum(list(distribution.values())[len(kept):]), 4)
+
+
+def test_no_cursor_without_cut():
+    @bounded
+    def tool(cursor=None, round_digits=4):
+        page, meta = paginate_distribution(_shares(10), 5, cursor)
+        return {"distribution": page, **meta}
+
+    assert tool()["next_cursor"] == "5"
+    assert "next_cursor" not in tool(cursor="5")
@@ -0,0 +1,30 @@
+import asyncio
+
+import pandas as pd
+import pytest
+from fastmcp import FastMCP
+
+import compact
+import data_analysis_tools
+from utils import read_excel
+
+pytest.importorskip("duckdb")
+
+
+@pytest.fixture
+def query_data():
+    mcp = FastMCP("test")
+    data_analysis_tools.register_tools(mcp)
+    return asyncio.run(mcp.get_tools())["query_data"].fn
+
+
+def test_query_mixed_type_codes(data_dir, query_data, monkeypatch):
+    monkeypatch.setattr(compact, "COMPACT_ENABLED", True)
+    codes = [1, 2, "absent", 1, 2, 1, 2, 1, "absent", 2]
+    pd.DataFrame({"code": codes, "score": range(10)}).to_excel(data_dir / "codes.xlsx", index=False)
+    assert isinstance(read_excel("codes.xlsx")["code"].dtype, pd.CategoricalDtype)
+
+    result = query_data(query="SELECT code, count(*) AS n FROM codes GROUP BY code ORDER BY n, code")
+
+    assert "error" not in result
+    assert result["rows"] == [["absent", 2], ["1", 4], ["2", 4]]